@@ -1,4 +1,5 @@
 import os
+import time
 import asyncio
 import discord
 from discord.ext import tasks
@@ -6,18 +7,112 @@ from discord import app_commands
 from colorama import Fore
 from .configuration import Configuration
 from .get_stats import get_stats
-from .send_message_for_all import send_message_for_all
+from .panels import load_panels, panel_name
+from .details_cache import DetailsCache
+from .edit_tracker import EditTracker
+from .edit_scheduler import EditScheduler
+from .embed_templates import EmbedTemplates
+from .message_map import MessageMap
+from .state_cache import StateCache
+from .snapshot_store import SnapshotStore
+from .webhook import close_notifier
+from .history import HistoryStore
+from .live_stats import LiveStats
+from .poll_scheduler import PollScheduler
+from .metrics import MetricsServer, TICK_SECONDS, update_server_metrics
+from .perf import PERF
+from .send_message_for_all import publish_rendered, render_servers
+from .channels import load_routes
+from .panel_client import close_panel_clients
+
+# Settings only read while starting up
+RESTART_REQUIRED = (
+    'ingest', 'metrics', 'history', 'perf', 'pool_size', 'timeout', 'circuit_breaker', 'polling.adaptive', 'reload',
+    'message.edit_rate', 'message.edit_per', 'message.edit_concurrency'
+)
+
+# Rendered settings the edit tracker's fingerprint does not cover
+UNTRACKED_RENDER = ('embed.description', 'message.content')
+
+def configured_servers(settings):
+    """Server IDs under `server_ids` and under every entry of `panels`"""
+    server_ids = set(settings.get('server_ids') or [])
+    for entry in settings.get('panels') or []:
+        server_ids.update(entry.get('server_ids') or [])
+    return server_ids
+
+class StatsClient(discord.Client):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Coroutine functions awaited before the Discord connection closes
+        self.shutdown_hooks = [close_panel_clients, close_notifier]
+    
+    async def close(self):
+        """Run shutdown hooks (pooled panel connections, pending cache writes) and disconnect"""
+        for hook in self.shutdown_hooks:
+            try:
+                await hook()
+            except Exception as e:
+                print(f"{Fore.CYAN}[PSS] {Fore.RED}Error during shutdown: {str(e)}")
+        await super().close()
 
 class Application:
     def __init__(self):
         self.config = Configuration()
+        PERF.configure(self.config.get('perf.window', 500), self.config.get('perf.trace_file') or None)
+        self.details_cache = DetailsCache(self.config.get('cache.details_ttl', 300))
+        self.edit_tracker = EditTracker(self.config.get('message.min_edit_interval', 60))
+        self.embed_templates = EmbedTemplates()
+        self.edit_scheduler = EditScheduler(
+            rate=self.config.get('message.edit_rate', 5),
+            per=self.config.get('message.edit_per', 5),
+            concurrency=self.config.get('message.edit_concurrency', 2)
+        )
+        self.message_map = MessageMap()
+        # Message maps of the channels under `channels`, by channel ID
+        self.message_maps = {}
+        self.state_cache = StateCache(flush_interval=self.config.get('cache.flush_interval', 5))
+        # Ingestion writes the latest stats of each server here, publishing renders them
+        self.snapshots = SnapshotStore()
+        self.fetching = {}
+        self.ingest_rounds = set()
+        self.publisher = None
+        self.live_stats = None
+        if self.config.get('ingest.mode', 'poll') == 'websocket':
+            self.live_stats = LiveStats(self.config, max_age=self.config.get('ingest.max_age', 30))
+        self.poll_scheduler = PollScheduler(self.config) if self.config.get('polling.adaptive', False) else None
+        self.metrics_server = None
+        if self.config.get('metrics.enable', False):
+            self.metrics_server = MetricsServer(
+                host=self.config.get('metrics.host', '127.0.0.1'),
+                port=self.config.get('metrics.port', 9464)
+            )
+        self.history = None
+        if self.config.get('history.enable', False):
+            self.history = HistoryStore(
+                path=self.config.get('history.path', 'history'),
+                retention=self.config.get('history.retention', {}),
+                flush_interval=self.config.get('history.flush_interval', 60)
+            )
         # Create Discord client with minimal intents
         intents = discord.Intents.default()
         intents.message_content = False
         intents.guilds = True
         
-        self.client = discord.Client(intents=intents)
+        self.client = StatsClient(intents=intents)
+        # Stop fetching and publishing before anything they use is closed
+        self.client.shutdown_hooks.insert(0, self.stop_pipeline)
+        self.client.shutdown_hooks.append(self.state_cache.flush)
+        self.client.shutdown_hooks.append(self.edit_scheduler.close)
+        if self.history is not None:
+            self.client.shutdown_hooks.append(self.history.flush)
+        if self.live_stats is not None:
+            self.client.shutdown_hooks.append(self.live_stats.close)
+        if self.metrics_server is not None:
+            self.client.shutdown_hooks.append(self.metrics_server.stop)
         self.tree = app_commands.CommandTree(self.client)
+        self.stats_loop = None
+        self.config_loop = None
         self._setup_commands()
     
     def _setup_commands(self):
@@ -25,20 +120,36 @@ class Application:
             name="addserver",
             description="Add a Pterodactyl server to monitor"
         )
-        @app_commands.describe(server_id="The Pterodactyl server ID to add")
-        async def addserver(interaction: discord.Interaction, server_id: str):
+        @app_commands.describe(
+            server_id="The Pterodactyl server ID to add",
+            panel="Name of the panel under `panels` the server is on (defaults to PanelURL)"
+        )
+        async def addserver(interaction: discord.Interaction, server_id: str, panel: str = None):
             if not interaction.user.guild_permissions.administrator:
                 await interaction.response.send_message("You need administrator permissions to use this command!", ephemeral=True)
                 return
             
-            server_ids = self.config.get('server_ids', [])
-            if server_id in server_ids:
+            if self._find_server(server_id) is not None:
                 await interaction.response.send_message(f"Server {server_id} is already being monitored!", ephemeral=True)
                 return
             
-            server_ids.append(server_id)
-            self.config.set('server_ids', server_ids)
+            if panel is None:
+                if not os.getenv('PanelURL'):
+                    await interaction.response.send_message("No default panel is set (PanelURL)! Pass the name of one of the panels under `panels`.", ephemeral=True)
+                    return
+                self.config.set('server_ids', list(self.config.get('server_ids', [])) + [server_id])
+            else:
+                entries = [dict(entry) for entry in self.config.get('panels') or []]
+                matches = [entry for index, entry in enumerate(entries) if panel_name(entry, index) == panel]
+                if not matches:
+                    await interaction.response.send_message(f"There is no panel named {panel}!", ephemeral=True)
+                    return
+                matches[0]['server_ids'] = list(matches[0].get('server_ids') or []) + [server_id]
+                self.config.set('panels', entries)
             self.config.save()
+            self.details_cache.invalidate(server_id)
+            if self.poll_scheduler is not None:
+                self.poll_scheduler.forget(server_id)
             
             await interaction.response.send_message(f"Added server {server_id} to monitoring list!", ephemeral=True)
             await self.update_all_servers()
@@ -53,14 +164,23 @@ class Application:
                 await interaction.response.send_message("You need administrator permissions to use this command!", ephemeral=True)
                 return
             
-            server_ids = self.config.get('server_ids', [])
-            if server_id not in server_ids:
+            owner = self._find_server(server_id)
+            if owner is None:
                 await interaction.response.send_message(f"Server {server_id} is not in the monitoring list!", ephemeral=True)
                 return
             
-            server_ids.remove(server_id)
-            self.config.set('server_ids', server_ids)
+            if owner == 'default':
+                self.config.set('server_ids', [sid for sid in self.config.get('server_ids', []) if sid != server_id])
+            else:
+                entries = [dict(entry) for entry in self.config.get('panels') or []]
+                entries[owner]['server_ids'] = [sid for sid in entries[owner]['server_ids'] if sid != server_id]
+                self.config.set('panels', entries)
             self.config.save()
+            self.details_cache.invalidate(server_id)
+            if self.poll_scheduler is not None:
+                self.poll_scheduler.forget(server_id)
+            if server_id not in configured_servers(self.config):
+                self.state_cache.remove(server_id)
             
             await interaction.response.send_message(f"Removed server {server_id} from monitoring list!", ephemeral=True)
             await self.update_all_servers()
@@ -71,12 +191,37 @@ class Application:
         )
         async def listservers(interaction: discord.Interaction):
             server_ids = self.config.get('server_ids', [])
-            if not server_ids:
+            panels = [panel for panel in self.config.get('panels') or [] if panel.get('server_ids')]
+            if not server_ids and not panels:
                 await interaction.response.send_message("No servers are currently being monitored!", ephemeral=True)
                 return
             
             server_list = "\n".join(f"• {sid}" for sid in server_ids)
+            for index, panel in enumerate(self.config.get('panels') or []):
+                if panel.get('server_ids'):
+                    panel_servers = "\n".join(f"• {sid}" for sid in panel['server_ids'])
+                    server_list += f"\n**{panel_name(panel, index)}**\n{panel_servers}"
             await interaction.response.send_message(f"Currently monitored servers:\n{server_list}", ephemeral=True)
+
+        @self.tree.command(
+            name="perf",
+            description="Show timings of recent stats updates"
+        )
+        async def perf(interaction: discord.Interaction):
+            if not interaction.user.guild_permissions.administrator:
+                await interaction.response.send_message("You need administrator permissions to use this command!", ephemeral=True)
+                return
+            
+            await interaction.response.send_message(f"Timings over the last {PERF.window} samples per phase:\n```\n{PERF.format_summary()}\n```", ephemeral=True)
+    
+    def _find_server(self, server_id):
+        """Return 'default' or the index under `panels` of the panel monitoring a server, or None"""
+        if server_id in self.config.get('server_ids', []):
+            return 'default'
+        for index, entry in enumerate(self.config.get('panels') or []):
+            if server_id in (entry.get('server_ids') or []):
+                return index
+        return None
     
     def run(self):
         """Run the Discord bot application"""
@@ -94,15 +239,36 @@ class Application:
             if self.config.get('presence.enable'):
                 await self._set_presence()
             
+            # Start the Prometheus endpoint on this event loop
+            if self.metrics_server is not None:
+                try:
+                    await self.metrics_server.start()
+                except OSError as e:
+                    print(f"{Fore.CYAN}[PSS] {Fore.RED}Metrics Error | Could not listen on {self.metrics_server.host}:{self.metrics_server.port}: {str(e)}")
+            
             # Update all servers
             await self.update_all_servers()
             self.stats_loop.start()
+            if self.publisher is None:
+                self.publisher = asyncio.create_task(self.publish_loop())
+            
+            # Pick up edits to the config file without a restart
+            if self.config.get('reload.enable', True) and not self.config_loop.is_running():
+                self.config_loop.start()
         
         @tasks.loop(seconds=self.config.get('refresh', 10))
         async def stats_loop():
-            await self.update_all_servers()
+            # Only start fetching: snapshots are published by publish_loop as they arrive
+            round_task = asyncio.create_task(self._ingest_round())
+            self.ingest_rounds.add(round_task)
+            round_task.add_done_callback(self.ingest_rounds.discard)
+        
+        @tasks.loop(seconds=self.config.get('reload.interval', 5))
+        async def config_loop():
+            await self.reload_config()
         
         self.stats_loop = stats_loop
+        self.config_loop = config_loop
         
         # Start the bot
         try:
@@ -119,7 +285,12 @@ class Application:
             print(f"{Fore.CYAN}[PSS] {Fore.RED}Discord Error | {str(e)}")
             exit(1)
     async def update_all_servers(self):
-        """Fetch and post stats for all servers and send a single message to Discord"""
+        """Fetch stats for all servers, then publish them once"""
+        await self.ingest()
+        await self.publish()
+    
+    async def ingest(self):
+        """Fetch stats for all servers, storing each server's snapshot as soon as it arrives"""
         # Get server IDs from config
         server_ids = self.config.get('server_ids', [])
         
@@ -140,27 +311,190 @@ class Application:
                 self.config.set('server_ids', server_ids)
                 self.config.save()
         
-        if not server_ids:
+        tick_started = time.perf_counter()
+        panels = load_panels(self.config, server_ids)
+        
+        # Also monitor every server on each panel matching discovery.filter
+        if self.config.get('discovery.auto', False):
+            with PERF.span('discovery'):
+                found = await asyncio.gather(*(
+                    self.details_cache.discover(panel.context(), self.config, exclude=panel.server_ids)
+                    for panel in panels
+                ))
+            for panel, discovered in zip(panels, found):
+                panel.server_ids += discovered
+        
+        # Gather stats for all panels at once, at most `concurrency` requests in flight per panel
+        fetches = []
+        for panel in panels:
+            semaphore = asyncio.Semaphore(panel.concurrency)
+            fetches.extend((context, semaphore) for context in panel.contexts())
+        contexts = [context for context, _ in fetches]
+        
+        self.snapshots.monitor([context.server_id for context in contexts])
+        if not contexts:
             print(f"{Fore.CYAN}[PSS] {Fore.RED}No server IDs found in config or environment!")
             return
-
-        # Gather stats for all servers
-        all_stats = []
-        for server_id in server_ids:
-            os.environ['ServerID'] = server_id
-            try:
-                stats = await get_stats(self.client, self.config, return_data=True)
-                if stats and isinstance(stats, dict) and 'details' in stats and 'stats' in stats:
-                    all_stats.append(stats)
-                else:
-                    print(f"{Fore.CYAN}[PSS] {Fore.RED}Invalid stats received for server {server_id}")
-            except Exception as e:
-                print(f"{Fore.CYAN}[PSS] {Fore.RED}Error getting stats for server {server_id}: {str(e)}")
-                continue
-
+        
+        if self.config.get('discovery.bulk', True):
+            # A few listing pages instead of one details request per server
+            with PERF.span('discovery', servers=len(contexts)):
+                await self.details_cache.prefetch(contexts, self.config)
+        if self.live_stats is not None:
+            self.live_stats.sync(contexts)
+        
+        started = []
+        for context, semaphore in fetches:
+            # A server still being fetched from an earlier tick stores its snapshot when that fetch ends
+            if context.server_id not in self.fetching:
+                task = asyncio.create_task(self._ingest_server(context, semaphore))
+                self.fetching[context.server_id] = task
+                started.append(task)
+        await asyncio.gather(*started)
+        tick_seconds = time.perf_counter() - tick_started
+        TICK_SECONDS.observe(tick_seconds)
+        PERF.record('tick', tick_seconds, servers=len(contexts))
+        PERF.flush()
+    
+    async def _ingest_round(self):
+        try:
+            await self.ingest()
+        except Exception as e:
+            print(f"{Fore.CYAN}[PSS] {Fore.RED}Error collecting server stats: {str(e)}")
+    
+    async def _ingest_server(self, context, semaphore):
+        try:
+            stats = await self._fetch_server(context, semaphore)
+        finally:
+            del self.fetching[context.server_id]
+        if not stats:
+            return
+        
+        # Keep every sample that came from the panel for trends and graphs
+        if self.history is not None and stats['stats']['current_state'] != 'missing':
+            self.history.append(context.server_id, stats['timestamp'], stats['stats']['resources'])
+        self.snapshots.put(context.server_id, stats)
+    
+    async def publish(self):
+        """Render and publish the latest snapshot of every server"""
+        # The store keeps the order of panels and server_ids, so messages stay in a stable order
+        all_stats = self.snapshots.snapshot()
+        update_server_metrics(all_stats)
+        
         # Only send message if we have valid stats
         if all_stats:
-            await send_message_for_all(self.client, all_stats, self.config)
+            await self._publish(all_stats)
+    
+    async def publish_loop(self):
+        """Publish whenever ingestion stores a new snapshot, at most every pipeline.publish_interval seconds"""
+        while True:
+            await self.snapshots.wait()
+            try:
+                await self.publish()
+            except Exception as e:
+                print(f"{Fore.CYAN}[PSS] {Fore.RED}Error publishing server stats: {str(e)}")
+            await asyncio.sleep(self.config.get('pipeline.publish_interval', 2))
+    
+    async def stop_pipeline(self):
+        """Cancel running fetches and the publisher"""
+        if self.stats_loop is not None:
+            self.stats_loop.cancel()
+        pending = list(self.ingest_rounds) + list(self.fetching.values())
+        if self.publisher is not None:
+            pending.append(self.publisher)
+            self.publisher = None
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    
+    async def _publish(self, all_stats):
+        """Render every server once and publish to all routed channels concurrently"""
+        with PERF.span('render', servers=len(all_stats)):
+            rendered = render_servers(all_stats, self.config, self.embed_templates)
+        
+        routes = load_routes(self.config, self.message_map, self.message_maps)
+        results = await asyncio.gather(*(
+            publish_rendered(
+                self.client,
+                route.channel_id,
+                [item for server_data, item in zip(all_stats, rendered) if route.wants(server_data)],
+                self.config,
+                route.message_map,
+                self.edit_tracker,
+                self.embed_templates,
+                self.edit_scheduler
+            )
+            for route in routes
+        ), return_exceptions=True)
+        for route, result in zip(routes, results):
+            if isinstance(result, Exception):
+                print(f"{Fore.CYAN}[PSS] {Fore.RED}Error posting server stats to channel {route.channel_id}: {str(result)}")
+    
+    async def reload_config(self):
+        """Apply changes made to the config file since the last check"""
+        previous = self.config.snapshot
+        changed = self.config.reload()
+        if not changed:
+            return
+        
+        def touched(*prefixes):
+            return any(key == prefix or key.startswith(f"{prefix}.") for key in changed for prefix in prefixes)
+        
+        if touched('refresh') and self.stats_loop is not None:
+            self.stats_loop.change_interval(seconds=self.config.get('refresh', 10))
+        if touched('message.min_edit_interval'):
+            self.edit_tracker.min_interval = self.config.get('message.min_edit_interval', 60)
+        if touched('cache.details_ttl'):
+            self.details_cache.ttl = self.config.get('cache.details_ttl', 300)
+        if touched('cache.flush_interval'):
+            self.state_cache.flush_interval = self.config.get('cache.flush_interval', 5)
+        if touched('discovery'):
+            self.details_cache.invalidate()
+        if touched('server_ids', 'panels'):
+            old_ids = configured_servers(previous)
+            new_ids = configured_servers(self.config)
+            for server_id in old_ids ^ new_ids:
+                self.details_cache.invalidate(server_id)
+                if self.poll_scheduler is not None:
+                    self.poll_scheduler.forget(server_id)
+            for server_id in old_ids - new_ids:
+                self.state_cache.remove(server_id)
+        if touched('presence') and self.client.is_ready():
+            if self.config.get('presence.enable'):
+                await self._set_presence()
+            else:
+                await self.client.change_presence(activity=None)
+        if touched(*UNTRACKED_RENDER):
+            self.edit_tracker.forget()
+        
+        restart = [prefix for prefix in RESTART_REQUIRED if touched(prefix)]
+        if restart:
+            print(f"{Fore.CYAN}[PSS] {Fore.YELLOW}Restart the bot to apply changes to: {', '.join(restart)}")
+        
+        # Messages whose render did not change are skipped by the edit tracker
+        await self.update_all_servers()
+    
+    async def _fetch_server(self, context, semaphore):
+        """Fetch stats for one server, returning None if they could not be collected"""
+        previous = self.state_cache.get(context.server_id)
+        if self.poll_scheduler is not None and previous and not self.poll_scheduler.is_due(context.server_id):
+            # Not due yet, keep showing the last known data
+            return previous
+        
+        async with semaphore:
+            try:
+                stats = await get_stats(self.client, context, self.config, return_data=True, details_cache=self.details_cache, state_cache=self.state_cache, live_stats=self.live_stats)
+            except Exception as e:
+                print(f"{Fore.CYAN}[PSS] {Fore.RED}Error getting stats for server {context.server_id}: {str(e)}")
+                return None
+        
+        if stats and isinstance(stats, dict) and 'details' in stats and 'stats' in stats:
+            if self.poll_scheduler is not None:
+                self.poll_scheduler.record(context.server_id, stats, previous)
+            return stats
+        
+        print(f"{Fore.CYAN}[PSS] {Fore.RED}Invalid stats received for server {context.server_id}")
+        return None
     
     async def _set_presence(self):
         """Set bot presence/status"""
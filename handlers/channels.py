@@ -0,0 +1,59 @@
+import os
+from .message_map import MessageMap
+from .panels import load_panels
+
+class ChannelRoute:
+    """A Discord channel, its message map and the servers whose stats it shows"""
+
+    __slots__ = ('channel_id', 'message_map', 'server_ids', 'panel_urls')
+
+    def __init__(self, channel_id, message_map, server_ids=None, panel_urls=None):
+        self.channel_id = channel_id
+        self.message_map = message_map
+        # None shows every server
+        self.server_ids = set(server_ids) if server_ids else None
+        self.panel_urls = set(panel_urls) if panel_urls is not None else None
+
+    def wants(self, server_data):
+        if self.panel_urls is not None and server_data.get('panel_url') not in self.panel_urls:
+            return False
+        if self.server_ids is not None:
+            uuid = server_data['details'].get('uuid') or ''
+            # Server IDs can be given as UUIDs or as the short identifier
+            ids = (server_data.get('server_id'), uuid, uuid[:8])
+            return any(server_id in self.server_ids for server_id in ids)
+        return True
+
+    def __repr__(self):
+        return f"ChannelRoute({self.channel_id!r})"
+
+def load_routes(config, default_map, message_maps):
+    """The DiscordChannel channel showing every server, followed by every entry under `channels`
+
+    `message_maps` holds the maps of the extra channels between ticks; each
+    one is persisted to messages-<channel id>.json.
+    """
+    routes = {}
+    default_channel = os.getenv('DiscordChannel')
+    if default_channel:
+        routes[int(default_channel)] = ChannelRoute(int(default_channel), default_map)
+
+    entries = config.get('channels') or []
+    panel_urls = {}
+    if any(entry.get('panels') for entry in entries):
+        panel_urls = {panel.name: panel.url for panel in load_panels(config, [])}
+
+    for entry in entries:
+        channel_id = int(entry['id'])
+        if channel_id in routes:
+            # The DiscordChannel channel can be narrowed down like any other
+            message_map = routes[channel_id].message_map
+        else:
+            message_map = message_maps.get(channel_id)
+            if message_map is None:
+                message_map = message_maps[channel_id] = MessageMap(f"messages-{channel_id}.json")
+        urls = None
+        if entry.get('panels'):
+            urls = [panel_urls[name] for name in entry['panels'] if name in panel_urls]
+        routes[channel_id] = ChannelRoute(channel_id, message_map, entry.get('server_ids'), urls)
+    return list(routes.values())
@@ -0,0 +1,91 @@
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the panel while a circuit is open"""
+    
+    def __init__(self, name, retry_in):
+        super().__init__(f"Circuit for {name} is open, retrying in {retry_in:.0f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+class CircuitBreaker:
+    """Stops calls to a failing panel or server, backing off exponentially with jitter"""
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+    
+    def __init__(self, name, failure_threshold=3, base_delay=5, max_delay=300):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failures = 0
+        self.opened = 0
+        self.open_until = 0
+        self._probing = False
+    
+    @property
+    def state(self):
+        if self.open_until == 0:
+            return self.CLOSED
+        if time.monotonic() < self.open_until:
+            return self.OPEN
+        return self.HALF_OPEN
+    
+    def check(self):
+        """Raise CircuitOpenError if a call may not be made right now"""
+        state = self.state
+        if state == self.OPEN:
+            raise CircuitOpenError(self.name, self.open_until - time.monotonic())
+        if state == self.HALF_OPEN and self._probing:
+            # One probe at a time while half-open
+            raise CircuitOpenError(self.name, 0)
+    
+    def begin(self):
+        """Mark a call as started; while half-open this is the probe"""
+        if self.state == self.HALF_OPEN:
+            self._probing = True
+    
+    def release(self):
+        """End a call without an outcome for this breaker"""
+        self._probing = False
+    
+    def record_success(self):
+        self.failures = 0
+        self.opened = 0
+        self.open_until = 0
+        self._probing = False
+    
+    def record_failure(self, retry_after=None):
+        """Count a failure, opening the circuit after enough of them or on an explicit Retry-After"""
+        was_probing = self._probing
+        self._probing = False
+        self.failures += 1
+        if retry_after is None and not was_probing and self.failures < self.failure_threshold:
+            return
+        
+        if retry_after is not None:
+            delay = min(self.max_delay, retry_after)
+        else:
+            delay = min(self.max_delay, self.base_delay * 2 ** self.opened)
+            delay *= random.uniform(0.8, 1.2)
+        self.opened += 1
+        self.open_until = time.monotonic() + delay
+
+def parse_retry_after(value):
+    """Return the seconds of a Retry-After header (delay or HTTP date), or None if missing"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
@@ -1,9 +1,13 @@
 import os
 import yaml
+from types import MappingProxyType
 from colorama import Fore, Style
 from urllib.parse import urlparse
 from dotenv import load_dotenv
 
+class ConfigError(ValueError):
+    """The configuration file is not usable"""
+
 class Configuration:
     def __init__(self):
         print(f"{Fore.CYAN}[PSS] {Fore.YELLOW}Loading configuration...")
@@ -13,20 +17,37 @@ class Configuration:
         
         # Load main config
         self.config_file = "config.yml"
+        # Bumped on every change, lets callers cache what they derive from the config
+        self.version = 0
         if os.path.exists("config-dev.yml"):
             print(f"{Fore.CYAN}[PSS] {Fore.YELLOW}Using development configuration...")
             self.config_file = "config-dev.yml"
         
-        with open(self.config_file, 'r', encoding='utf-8') as file:
-            self.config = yaml.safe_load(file)
+        self._mtime = self._modified()
+        self.config = self._load()
         
         # Validate configuration
-        self._validate_config()
+        try:
+            self._validate_config(self.config)
+        except ConfigError as e:
+            print(f"Config Error | {e}")
+            exit(1)
+        self._compile()
         
         print(f"{Fore.CYAN}[PSS] {Fore.YELLOW}Configuration loaded")
     
-    def _validate_config(self):
-        """Validate configuration settings"""
+    def _load(self):
+        with open(self.config_file, 'r', encoding='utf-8') as file:
+            return yaml.safe_load(file)
+    
+    def _modified(self):
+        try:
+            return os.stat(self.config_file).st_mtime_ns
+        except OSError:
+            return None
+    
+    def _validate_config(self, config):
+        """Validate configuration settings, raising ConfigError"""
         # Validate Panel URL
         panel_url = os.getenv('PanelURL')
         if panel_url:
@@ -35,24 +56,87 @@ class Configuration:
                 if not parsed_url.scheme.startswith('http'):
                     raise ValueError("Invalid URL scheme")
             except Exception:
-                print('Config Error | Invalid URL Format! Example Correct URL: "https://panel.example.com"')
-                exit(1)
+                raise ConfigError('Invalid URL Format! Example Correct URL: "https://panel.example.com"')
         
         # Validate config version
-        if self.config.get('version') != 1:
-            print('Config Error | Invalid config version! The config has been updated. Please get the new config format from: \n>> https://github.com/HirziDevs/PteroServerStats/blob/main/config.yml <<')
-            exit(1)
+        if not isinstance(config, dict) or config.get('version') != 1:
+            raise ConfigError('Invalid config version! The config has been updated. Please get the new config format from: \n>> https://github.com/HirziDevs/PteroServerStats/blob/main/config.yml <<')
+        
+        # Extra panels need somewhere to connect to and a key
+        panels = config.get('panels') or []
+        if not isinstance(panels, list):
+            raise ConfigError('Invalid panels! It must be a list of panels with a url and a key.')
+        for index, panel in enumerate(panels, start=1):
+            if not isinstance(panel, dict) or not str(panel.get('url') or '').startswith('http'):
+                raise ConfigError(f'Invalid URL for panel {index}! Example Correct URL: "https://panel.example.com"')
+            if not panel.get('key') and not panel.get('key_env'):
+                raise ConfigError(f'Missing key for panel {index}! Set `key` or `key_env` (the name of an environment variable).')
+            if not panel.get('key') and not os.getenv(panel['key_env']):
+                raise ConfigError(f'Missing key for panel {index}! The environment variable {panel["key_env"]} is not set.')
+        
+        # Every routed channel needs a channel ID
+        channels = config.get('channels') or []
+        if not isinstance(channels, list):
+            raise ConfigError('Invalid channels! It must be a list of channels with an id.')
+        for index, channel in enumerate(channels, start=1):
+            try:
+                int(channel['id'])
+            except (TypeError, KeyError, ValueError):
+                raise ConfigError(f'Invalid id for channel {index}! Use the numeric Discord channel ID.')
+        
+        # tasks.loop rejects anything else
+        refresh = config.get('refresh', 10)
+        if isinstance(refresh, bool) or not isinstance(refresh, (int, float)) or refresh <= 0:
+            raise ConfigError('Invalid refresh! It must be a number of seconds greater than 0.')
+    
+    def reload(self):
+        """Swap in config_file if it changed on disk; returns the changed keys, or None if nothing was swapped"""
+        mtime = self._modified()
+        if mtime is None or mtime == self._mtime:
+            return None
+        self._mtime = mtime
+        
+        try:
+            config = self._load()
+            self._validate_config(config)
+        except (OSError, yaml.YAMLError, ConfigError) as e:
+            print(f"{Fore.CYAN}[PSS] {Fore.RED}Config Error | {str(e)} Keeping the previous configuration.")
+            return None
+        
+        previous = self.snapshot
+        self.config = config
+        self._compile()
+        
+        changed = sorted(
+            key for key in set(previous) | set(self.snapshot)
+            if not isinstance(previous.get(key), dict) and not isinstance(self.snapshot.get(key), dict)
+            and previous.get(key) != self.snapshot.get(key)
+        )
+        print(f"{Fore.CYAN}[PSS] {Fore.GREEN}Configuration reloaded, {len(changed)} setting(s) changed")
+        return changed
+    
+    @staticmethod
+    def _flatten(config, prefix='', flat=None):
+        """Map every dotted key path to its value, including the nested sections themselves"""
+        if flat is None:
+            flat = {}
+        for key, value in config.items():
+            if not isinstance(key, str):
+                continue
+            path = f"{prefix}{key}"
+            flat[path] = value
+            if isinstance(value, dict):
+                Configuration._flatten(value, f"{path}.", flat)
+        return flat
+    
+    def _compile(self):
+        """Rebuild the read-only lookup snapshot, called whenever the config changes"""
+        self.snapshot = MappingProxyType(self._flatten(self.config or {}))
+        self.version += 1
     
     def get(self, key, default=None):
         """Get configuration value"""
-        keys = key.split('.')
-        value = self.config
-        for k in keys:
-            if isinstance(value, dict) and k in value:
-                value = value[k]
-            else:
-                return default
-        return value
+        return self.snapshot.get(key, default)
     
     def set(self, key, value):
         """Set configuration value"""
@@ -67,9 +151,12 @@ class Configuration:
         
         # Set the value
         config[keys[-1]] = value
+        self._compile()
     
     def save(self):
         """Save configuration to file"""
         with open(self.config_file, 'w', encoding='utf-8') as file:
             yaml.dump(self.config, file, default_flow_style=False)
+        # Our own write is not an external change to reload
+        self._mtime = self._modified()
         print(f"{Fore.CYAN}[PSS] {Fore.GREEN}Configuration saved")
\ No newline at end of file
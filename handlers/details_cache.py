@@ -0,0 +1,163 @@
+import asyncio
+import time
+from fnmatch import fnmatch
+from .get_server_details import get_server_details, print_panel_error
+from .get_server_stats import panel_unavailable
+from .list_servers import list_servers
+from .circuit_breaker import CircuitOpenError
+from .metrics import DETAILS_CACHE
+
+class DetailsCache:
+    """Per-server cache of server details (name, UUID, limits) with stale-while-revalidate"""
+    
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._entries = {}
+        self._refreshing = {}
+        # Paginated listings in flight / last auto-discovery result, per panel
+        self._bulk = {}
+        self._discovered = {}
+        # Servers a listing came back without, e.g. ones an admin key reaches outside /api/client
+        self._unlisted = set()
+    
+    async def get(self, context, config):
+        """Return details for a server, hitting the panel only when the entry is missing or stale"""
+        server_id = context.server_id
+        entry = self._entries.get(server_id)
+        
+        if entry is None:
+            DETAILS_CACHE.inc(result='miss')
+            return await self._refresh(context, config)
+        
+        details, fetched_at = entry
+        if time.monotonic() - fetched_at < self.ttl:
+            DETAILS_CACHE.inc(result='hit')
+            return details
+        
+        DETAILS_CACHE.inc(result='stale')
+        bulk = self._bulk.get((context.panel_url, context.panel_key))
+        listing = bulk is not None and not bulk.done() and server_id not in self._unlisted
+        if server_id not in self._refreshing and not listing:
+            # Serve the stale entry now and revalidate in the background, so a
+            # panel hiccup never costs us the details we already know
+            task = asyncio.create_task(self._revalidate(context, config))
+            self._refreshing[server_id] = task
+            task.add_done_callback(lambda t: self._forget_refresh(server_id, t))
+        
+        return details
+    
+    async def _revalidate(self, context, config):
+        try:
+            await self._refresh(context, config)
+        except Exception as e:
+            # The panel is backing off or unreachable, keep serving what we have
+            if not panel_unavailable(e):
+                raise
+    
+    async def _refresh(self, context, config):
+        # A timeout is the panel being slow: let it reach get_stats rather than reporting the server down
+        async with asyncio.timeout(config.get('timeout', 5)):
+            details = await get_server_details(context, config)
+        if details:
+            self._entries[context.server_id] = (details, time.monotonic())
+        return details
+    
+    def put(self, server_id, details):
+        """Store details fetched elsewhere, e.g. from a server listing"""
+        self._entries[server_id] = (details, time.monotonic())
+    
+    async def prefetch(self, contexts, config):
+        """Load missing and stale details with one paginated listing per panel instead of a request per server
+        
+        Waits only if some server has no details yet; stale entries keep being
+        served while the listing runs. Servers a listing did not return are
+        left to the per-server lookup in get() from then on.
+        """
+        now = time.monotonic()
+        groups = {}
+        for context in contexts:
+            entry = self._entries.get(context.server_id)
+            if entry is not None and now - entry[1] < self.ttl:
+                continue
+            if context.server_id in self._unlisted:
+                continue
+            if context.server_id in self._refreshing:
+                continue
+            groups.setdefault((context.panel_url, context.panel_key), []).append(context)
+        
+        waiting = []
+        for panel_key, group in groups.items():
+            task = self._bulk.get(panel_key)
+            if task is None or task.done():
+                task = self._bulk[panel_key] = asyncio.create_task(self._load(group, config))
+            if any(context.server_id not in self._entries for context in group):
+                waiting.append(task)
+        if waiting:
+            await asyncio.gather(*waiting)
+    
+    async def _load(self, contexts, config):
+        wanted = {context.server_id for context in contexts}
+        try:
+            servers = await list_servers(contexts[0].panel(config), config, wanted)
+        except CircuitOpenError:
+            return
+        except Exception as e:
+            print_panel_error(e)
+            return
+        for identifier, details in servers:
+            for server_id in (details['uuid'], identifier):
+                if server_id in wanted:
+                    self.put(server_id, details)
+                    wanted.discard(server_id)
+        self._unlisted |= wanted
+    
+    async def discover(self, context, config, exclude=()):
+        """Return the UUIDs of servers on a panel matching `discovery.filter`, skipping IDs in exclude
+        
+        The listing is repeated at most once per TTL and also fills the
+        details of every matched server.
+        """
+        panel_key = (context.panel_url, context.panel_key)
+        cached = self._discovered.get(panel_key)
+        matched = cached[0] if cached else []
+        if cached is None or time.monotonic() - cached[1] >= self.ttl:
+            patterns = config.get('discovery.filter', '*') or '*'
+            if isinstance(patterns, str):
+                patterns = [patterns]
+            try:
+                servers = await list_servers(context.panel(config), config)
+            except CircuitOpenError:
+                servers = None
+            except Exception as e:
+                print_panel_error(e)
+                servers = None
+            
+            # On failure keep the previous result and try again next tick
+            if servers is not None:
+                matched = []
+                for identifier, details in servers:
+                    names = (details['name'].lower(), details['uuid'], identifier)
+                    if any(fnmatch(name, pattern.lower()) for name in names if name for pattern in patterns):
+                        matched.append((details['uuid'], identifier))
+                        self.put(details['uuid'], details)
+                self._discovered[panel_key] = (matched, time.monotonic())
+        
+        exclude = set(exclude)
+        return [uuid for uuid, identifier in matched if uuid not in exclude and identifier not in exclude]
+    
+    def _forget_refresh(self, server_id, task):
+        if self._refreshing.get(server_id) is task:
+            del self._refreshing[server_id]
+    
+    def invalidate(self, server_id=None):
+        """Drop the cached details for one server, or for every server"""
+        server_ids = [server_id] if server_id is not None else list(self._entries)
+        if server_id is None:
+            self._discovered.clear()
+            self._unlisted.clear()
+        for sid in server_ids:
+            self._entries.pop(sid, None)
+            self._unlisted.discard(sid)
+            task = self._refreshing.pop(sid, None)
+            if task:
+                task.cancel()
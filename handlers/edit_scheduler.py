@@ -0,0 +1,151 @@
+import asyncio
+import itertools
+import time
+import discord
+from colorama import Fore
+from .metrics import DISCORD_EDITS, DISCORD_RATE_LIMITS
+
+# Lower runs first
+PRIORITY_STATE_CHANGE = 0
+PRIORITY_ROUTINE = 1
+
+class TokenBucket:
+    """Discord's per-channel message budget: `rate` requests every `per` seconds"""
+
+    def __init__(self, rate=5, per=5.0):
+        self.capacity = max(1, rate)
+        self.refill = self.capacity / per
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def reserve(self):
+        """Take a token and return how long to wait before using it"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill)
+        self.updated = now
+        self.tokens -= 1
+        wait = 0.0 if self.tokens >= 0 else -self.tokens / self.refill
+        return max(wait, self.blocked_until - now)
+
+    def pause(self, seconds):
+        """Hold every request for `seconds`, e.g. after a 429"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+class PendingEdit:
+    __slots__ = ('key', 'priority', 'seq', 'send')
+
+    def __init__(self, key, priority, seq, send):
+        self.key = key
+        self.priority = priority
+        self.seq = seq
+        self.send = send
+
+class ChannelQueue:
+    """Latest pending render per message of one channel, sent by a few workers within the channel's budget"""
+
+    def __init__(self, channel_id, rate, per, concurrency):
+        self.channel_id = channel_id
+        self.bucket = TokenBucket(rate, per)
+        self.pending = {}
+        self.in_flight = set()
+        self.wakeup = asyncio.Event()
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.workers = [asyncio.create_task(self._work()) for _ in range(max(1, concurrency))]
+
+    def submit(self, edit):
+        older = self.pending.get(edit.key)
+        if older is not None:
+            # Only the latest render matters, but it keeps the older one's place and urgency
+            edit.seq = older.seq
+            edit.priority = min(edit.priority, older.priority)
+        self.pending[edit.key] = edit
+        self.idle.clear()
+        self.wakeup.set()
+
+    def _next(self):
+        ready = [edit for edit in self.pending.values() if edit.key not in self.in_flight]
+        if not ready:
+            return None
+        return min(ready, key=lambda edit: (edit.priority, edit.seq))
+
+    async def _work(self):
+        while True:
+            edit = self._next()
+            if edit is None:
+                if not self.pending and not self.in_flight:
+                    self.idle.set()
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+
+            del self.pending[edit.key]
+            self.in_flight.add(edit.key)
+            try:
+                wait = self.bucket.reserve()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                # A newer render arrived while waiting: send that one instead
+                if edit.key not in self.pending:
+                    await self._send(edit)
+            finally:
+                self.in_flight.discard(edit.key)
+                self.wakeup.set()
+
+    async def _send(self, edit):
+        try:
+            await edit.send()
+        except discord.HTTPException as error:
+            DISCORD_EDITS.inc(result='error')
+            if error.status == 429:
+                DISCORD_RATE_LIMITS.inc()
+                self.bucket.pause(getattr(error, 'retry_after', None) or 5)
+                # Retry unless a newer render is already waiting
+                if edit.key not in self.pending:
+                    self.pending[edit.key] = edit
+            print(f"{Fore.CYAN}[PSS] {Fore.RED}Error posting server stats to channel {self.channel_id}: {error}")
+        except Exception as error:
+            DISCORD_EDITS.inc(result='error')
+            print(f"{Fore.CYAN}[PSS] {Fore.RED}Error posting server stats to channel {self.channel_id}: {error}")
+
+    async def close(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+
+class EditScheduler:
+    """Sends message edits per channel within Discord's rate limits, state changes first
+
+    Each message has at most one pending render: submitting a newer one
+    replaces it, so a congested channel never works through stale renders.
+    """
+
+    def __init__(self, rate=5, per=5.0, concurrency=2):
+        self.rate = rate
+        self.per = per
+        self.concurrency = concurrency
+        self._queues = {}
+        self._seq = itertools.count()
+
+    def submit(self, channel_id, key, send, priority=PRIORITY_ROUTINE):
+        """Queue `send` (an async callable) as the latest render of message `key` in a channel"""
+        queue = self._queues.get(channel_id)
+        if queue is None:
+            queue = self._queues[channel_id] = ChannelQueue(channel_id, self.rate, self.per, self.concurrency)
+        queue.submit(PendingEdit(key, priority, next(self._seq), send))
+
+    def discard(self, channel_id, key):
+        """Drop the pending render of a message, if any"""
+        queue = self._queues.get(channel_id)
+        if queue is not None:
+            queue.pending.pop(key, None)
+
+    async def drain(self):
+        """Wait until everything submitted so far has been sent"""
+        await asyncio.gather(*(queue.idle.wait() for queue in list(self._queues.values())))
+
+    async def close(self):
+        queues = list(self._queues.values())
+        self._queues.clear()
+        await asyncio.gather(*(queue.close() for queue in queues))
@@ -0,0 +1,62 @@
+import hashlib
+import json
+import time
+import discord
+
+class EditTracker:
+    """Remembers what each Discord message last showed, so unchanged renders skip the edit"""
+    
+    def __init__(self, min_interval=60):
+        # Unchanged messages are still edited this often to keep "Last update" honest
+        self.min_interval = min_interval
+        self._entries = {}
+    
+    @staticmethod
+    def fingerprint(embeds, view=None):
+        """Hash the parts of rendered embeds/view that describe the servers, not the clock"""
+        if isinstance(embeds, discord.Embed):
+            embeds = [embeds]
+        data = {'embeds': []}
+        for embed in embeds:
+            embed_data = embed.to_dict()
+            embed_data.pop('timestamp', None)
+            embed_data.pop('description', None)
+            data['embeds'].append(embed_data)
+        if view is not None:
+            data['components'] = [
+                (getattr(item, 'label', None), getattr(item, 'url', None))
+                for item in view.children
+            ]
+        payload = json.dumps(data, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def status(embeds):
+        """The Status field of each embed, what changes when a server goes up or down"""
+        return tuple(embed.fields[0].value if embed.fields else None for embed in embeds)
+    
+    def state_changed(self, key, status):
+        """Return True if a tracked message last showed a different status"""
+        entry = self._entries.get(key)
+        return entry is not None and entry[2] != status
+    
+    def should_edit(self, key, fingerprint):
+        """Return True if the message has changed or has not been touched for min_interval"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return True
+        last_fingerprint, edited_at, _ = entry
+        if last_fingerprint != fingerprint:
+            return True
+        return time.monotonic() - edited_at >= self.min_interval
+    
+    def record(self, key, fingerprint, status=None):
+        """Record a successful edit or send"""
+        self._entries[key] = (fingerprint, time.monotonic(), status)
+    
+    def forget(self, key=None):
+        """Forget one message, or every message so the next tick edits them all"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
@@ -0,0 +1,75 @@
+import os
+import discord
+
+def build_view(buttons):
+    """Build a view of link buttons, discord.py lays them out five per row"""
+    try:
+        view = discord.ui.View()
+        for label, url in buttons:
+            view.add_item(discord.ui.Button(label=label[:80], url=url, style=discord.ButtonStyle.link))
+        return view
+    except Exception:
+        return None
+
+class EmbedTemplate:
+    """The parts of a server's stats embed that only change with the config or the server's name"""
+
+    __slots__ = ('name', 'panel_url', 'title', 'color', 'footer_text', 'footer_icon', 'manage_url')
+
+    def __init__(self, details, config, panel_url):
+        uuid = details['uuid']
+        self.name = details['name']
+        self.panel_url = panel_url
+        self.title = f"{self.name} - {config.get('embed.title', 'Server Stats')}"
+        self.color = int(config.get('embed.color', '5865F2'), 16)
+        footer_text = config.get('embed.footer.text', 'PteroServerStats')
+        self.footer_text = f"{footer_text} • ID: {uuid[:8]}...{uuid[-4:]}"
+        self.footer_icon = config.get('embed.footer.icon', '')
+        self.manage_url = f"{panel_url}/server/{uuid}"
+
+    def render(self, fields, description, timestamp):
+        """Fill in the fields and times of one tick"""
+        embed = discord.Embed(title=self.title, color=self.color, description=description, timestamp=timestamp)
+        for name, value, inline in fields:
+            embed.add_field(name=name, value=value, inline=inline)
+        embed.set_footer(text=self.footer_text, icon_url=self.footer_icon)
+        return embed
+
+class EmbedTemplates:
+    """Templates and link-button views reused across ticks until the config version changes"""
+
+    def __init__(self):
+        self.version = None
+        self._templates = {}
+        self._views = {}
+
+    def _sync(self, config):
+        if config.version != self.version:
+            self.version = config.version
+            self.panel_url = (os.getenv('PanelURL') or '').rstrip('/')
+            self._templates.clear()
+            self._views.clear()
+
+    def get(self, details, config, panel_url=None):
+        """Return the template of a server, building it on first use or after a rename"""
+        self._sync(config)
+        panel_url = (panel_url or self.panel_url).rstrip('/')
+        uuid = details['uuid']
+        template = self._templates.get(uuid)
+        if template is None or template.name != details['name'] or template.panel_url != panel_url:
+            template = self._templates[uuid] = EmbedTemplate(details, config, panel_url)
+        return template
+
+    def view(self, buttons):
+        """Return a view for these (label, url) buttons; link buttons never dispatch, so one view can be reused"""
+        buttons = tuple(buttons)
+        if buttons not in self._views:
+            self._views[buttons] = build_view(buttons)
+        return self._views[buttons]
+
+    def prune(self, uuids):
+        """Drop templates of servers that are no longer shown"""
+        for uuid in self._templates.keys() - set(uuids):
+            del self._templates[uuid]
+        if len(self._views) > 2 * len(self._templates) + 16:
+            self._views.clear()
@@ -1,59 +1,27 @@
-import os
-import requests
+import asyncio
+import aiohttp
 from colorama import Fore
-from requests.exceptions import ConnectionError, Timeout, HTTPError, RequestException
+from .get_server_stats import panel_unavailable
 
-async def get_server_details():
-    """Get server details from Pterodactyl/Pelican panel"""
-    panel_url = os.getenv('PanelURL')
-    server_id = os.getenv('ServerID')
-    panel_key = os.getenv('PanelKEY')
-    
-    url = f"{panel_url}/api/client/servers/{server_id}"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {panel_key}"
-    }
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
-        attributes = data['attributes']
-        
-        return {
-            'uuid': attributes['uuid'],
-            'name': attributes['name'],
-            'limits': {
-                'memory': attributes['limits']['memory'],
-                'swap': attributes['limits']['swap'],
-                'disk': attributes['limits']['disk'],
-                'io': attributes['limits']['io'],
-                'cpu': attributes['limits']['cpu'],
-                'threads': attributes['limits']['threads']
-            }
+def parse_server_details(attributes):
+    """Pick the details PSS uses out of a server object's attributes"""
+    return {
+        'uuid': attributes['uuid'],
+        'name': attributes['name'],
+        'limits': {
+            'memory': attributes['limits']['memory'],
+            'swap': attributes['limits']['swap'],
+            'disk': attributes['limits']['disk'],
+            'io': attributes['limits']['io'],
+            'cpu': attributes['limits']['cpu'],
+            'threads': attributes['limits']['threads']
         }
-        
-    except ConnectionError as e:
-        if "Name or service not known" in str(e) or "nodename nor servname provided" in str(e):
-            print(f"{Fore.CYAN}[PSS] {Fore.RED}ENOTFOUND | DNS Error. Ensure your network connection and DNS server are functioning correctly.")
-        elif "Connection refused" in str(e):
-            print(f"{Fore.CYAN}[PSS] {Fore.RED}ECONNREFUSED | Connection refused. Ensure the panel is running and reachable.")
-        elif "Connection reset by peer" in str(e):
-            print(f"{Fore.CYAN}[PSS] {Fore.RED}ECONNRESET | Connection reset by peer. The panel closed the connection unexpectedly.")
-        elif "No route to host" in str(e):
-            print(f"{Fore.CYAN}[PSS] {Fore.RED}EHOSTUNREACH | Host unreachable. The panel is down or not reachable.")
-        else:
-            print(f"{Fore.CYAN}[PSS] {Fore.RED}Connection Error: {str(e)}")
-        return False
-        
-    except Timeout:
-        print(f"{Fore.CYAN}[PSS] {Fore.RED}ETIMEDOUT | Connection timed out. The panel took too long to respond.")
-        return False
-        
-    except HTTPError as e:
-        status_code = e.response.status_code
+    }
+
+def print_panel_error(e):
+    """Explain a failed panel request"""
+    if isinstance(e, aiohttp.ClientResponseError):
+        status_code = e.status
         if status_code == 401:
             print(f"{Fore.CYAN}[PSS] {Fore.RED}401 | Unauthorized. Invalid Application Key or API Key doesn't have permission to perform this action.")
         elif status_code == 403:
@@ -65,9 +33,38 @@ async def get_server_details():
         elif status_code in [500, 502, 503, 504]:
             print(f"{Fore.CYAN}[PSS] {Fore.RED}500 | Internal Server Error. This is an error with your panel, PSS is not the cause.")
         else:
-            print(f"{Fore.CYAN}[PSS] {Fore.RED}{status_code} | Unexpected error: {e.response.reason}")
-        return False
-        
-    except RequestException as e:
+            print(f"{Fore.CYAN}[PSS] {Fore.RED}{status_code} | Unexpected error: {e.message}")
+    
+    elif isinstance(e, asyncio.TimeoutError):
+        print(f"{Fore.CYAN}[PSS] {Fore.RED}ETIMEDOUT | Connection timed out. The panel took too long to respond.")
+    
+    elif isinstance(e, (aiohttp.ClientConnectionError, OSError)):
+        if "Name or service not known" in str(e) or "nodename nor servname provided" in str(e):
+            print(f"{Fore.CYAN}[PSS] {Fore.RED}ENOTFOUND | DNS Error. Ensure your network connection and DNS server are functioning correctly.")
+        elif "Connection refused" in str(e) or "Connect call failed" in str(e):
+            print(f"{Fore.CYAN}[PSS] {Fore.RED}ECONNREFUSED | Connection refused. Ensure the panel is running and reachable.")
+        elif "Connection reset by peer" in str(e) or isinstance(e, aiohttp.ServerDisconnectedError):
+            print(f"{Fore.CYAN}[PSS] {Fore.RED}ECONNRESET | Connection reset by peer. The panel closed the connection unexpectedly.")
+        elif "No route to host" in str(e):
+            print(f"{Fore.CYAN}[PSS] {Fore.RED}EHOSTUNREACH | Host unreachable. The panel is down or not reachable.")
+        else:
+            print(f"{Fore.CYAN}[PSS] {Fore.RED}Connection Error: {str(e)}")
+    
+    else:
         print(f"{Fore.CYAN}[PSS] {Fore.RED}Unexpected error: {str(e)}")
-        return False 
\ No newline at end of file
+
+async def get_server_details(context, config):
+    """Get server details from Pterodactyl/Pelican panel"""
+    server_id = context.server_id
+    panel = context.panel(config)
+    
+    try:
+        data = await panel.get(f"/api/client/servers/{server_id}", server_id=server_id)
+        return parse_server_details(data['attributes'])
+    
+    except (asyncio.TimeoutError, aiohttp.ClientError, OSError, ValueError, KeyError) as e:
+        print_panel_error(e)
+        if panel_unavailable(e):
+            # Let get_stats serve the last known state instead of reporting the server down
+            raise
+        return False 
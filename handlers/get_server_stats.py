@@ -1,24 +1,20 @@
-import os
-import requests
-from requests.exceptions import RequestException
+import asyncio
+import aiohttp
+from .circuit_breaker import CircuitOpenError
 
-async def get_server_stats(config):
+def panel_unavailable(error):
+    """Whether a failed request says nothing about the server: the panel is backing off, rate limiting or unreachable"""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status == 429
+    return isinstance(error, (CircuitOpenError, aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+async def get_server_stats(context, config):
     """Get server stats from Pterodactyl/Pelican panel"""
-    panel_url = os.getenv('PanelURL')
-    server_id = os.getenv('ServerID')
-    panel_key = os.getenv('PanelKEY')
-    
-    url = f"{panel_url}/api/client/servers/{server_id}/resources"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {panel_key}"
-    }
+    server_id = context.server_id
+    panel = context.panel(config)
     
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
+        data = await panel.get(f"/api/client/servers/{server_id}/resources", server_id=server_id)
         attributes = data['attributes']
         
         return {
@@ -27,6 +23,10 @@ async def get_server_stats(config):
         }
         
     except Exception as error:
+        if panel_unavailable(error):
+            # Let get_stats serve the last known state instead of reporting the server down
+            raise
+        # The panel answered for this server (e.g. 5xx or 404 from its node)
         if config.get('log_error'):
             print(f"Error getting server stats: {error}")
-        return False 
\ No newline at end of file
+        return False 
@@ -1,23 +1,43 @@
-import json
-import os
 import time
+import asyncio
 from colorama import Fore
 from .get_server_details import get_server_details
-from .get_server_stats import get_server_stats
-from .promise_timeout import promise_timeout
+from .get_server_stats import get_server_stats, panel_unavailable
 from .send_message import send_message
+from .webhook import notify_state_change
+from .perf import PERF
 
-async def get_stats(client, config, return_data=False):
+def record_state(data, state_cache, config):
+    """Notify on up/down transitions and remember the latest data for the server"""
+    if state_cache is None:
+        return
+    previous = state_cache.get(data['server_id'])
+    notify_state_change(data, previous, config)
+    state_cache.set(data['server_id'], data)
+
+async def get_stats(client, context, config, return_data=False, details_cache=None, state_cache=None, live_stats=None):
     """Get server stats and send to Discord (optionally just return data)"""
+    server_id = context.server_id
     try:
-        print(f"{Fore.CYAN}[PSS] {Fore.YELLOW}Fetching server details for server ID: {os.getenv('ServerID')}")
-        details = await promise_timeout(get_server_details(), config.get('timeout', 5))
+        print(f"{Fore.CYAN}[PSS] {Fore.YELLOW}Fetching server details for server ID: {server_id}")
+        with PERF.span('fetch_details', server_id=server_id):
+            if details_cache is not None:
+                details = await details_cache.get(context, config)
+            else:
+                async with asyncio.timeout(config.get('timeout', 5)):
+                    details = await get_server_details(context, config)
         
         if not details:
             raise Exception("Failed to get server details")
         
-        print(f"{Fore.CYAN}[PSS] {Fore.YELLOW}Fetching server resources for server ID: {os.getenv('ServerID')}")
-        stats = await promise_timeout(get_server_stats(config), config.get('timeout', 5))
+        # Prefer the websocket snapshot, polling /resources only when it is missing or stale
+        stats = live_stats.snapshot(server_id) if live_stats is not None else None
+        if stats is None:
+            print(f"{Fore.CYAN}[PSS] {Fore.YELLOW}Fetching server resources for server ID: {server_id}")
+            with PERF.span('fetch_resources', server_id=server_id):
+                # A timeout is the panel being slow, not the server being down: let it reach the handler below
+                async with asyncio.timeout(config.get('timeout', 5)):
+                    stats = await get_server_stats(context, config)
         
         if stats and stats.get('current_state') == "missing":
             print(f"{Fore.CYAN}[PSS] {Fore.RED}Server {details['name']} is currently down.")
@@ -25,6 +45,8 @@ async def get_stats(client, config, return_data=False):
             print(f"{Fore.CYAN}[PSS] {Fore.GREEN}Server {details['name']} state is normal.")
         
         data = {
+            'server_id': server_id,
+            'panel_url': context.panel_url,
             'details': details,
             'stats': stats or {
                 'current_state': 'missing',
@@ -40,6 +62,7 @@ async def get_stats(client, config, return_data=False):
             },
             'timestamp': int(time.time() * 1000)
         }
+        record_state(data, state_cache, config)
         
         if return_data:
             return data
@@ -51,15 +74,26 @@ async def get_stats(client, config, return_data=False):
         if config.get('log_error'):
             print(f"Error: {error}")
         
+        # Try the last known data for this server
+        cached = state_cache.get(server_id) if state_cache is not None else None
+        
+        if panel_unavailable(error) and cached:
+            # The panel is backing off, rate limiting or unreachable: show the
+            # last known state as-is instead of reporting the server down
+            print(f"{Fore.CYAN}[PSS] {Fore.YELLOW}Panel is unavailable, showing last known state for server ID: {server_id}")
+            if return_data:
+                return cached
+            await send_message(client, cached, config)
+            return cached
+        
         print(f"{Fore.CYAN}[PSS] {Fore.RED}Server is currently down.")
         
-        # Try to load cached data
-        if os.path.exists("cache.json"):
+        if cached:
             try:
-                with open("cache.json", 'r') as f:
-                    data = json.load(f)
+                data = dict(cached)
                 
                 # Update stats to show server as down
+                data['server_id'] = server_id
                 data['stats'] = {
                     'current_state': 'missing',
                     'is_suspended': False,
@@ -72,6 +106,7 @@ async def get_stats(client, config, return_data=False):
                         'uptime': 0
                     }
                 }
+                record_state(data, state_cache, config)
                 
                 if return_data:
                     return data
@@ -84,9 +119,11 @@ async def get_stats(client, config, return_data=False):
         
         # If we get here, create a minimal valid data structure
         fallback_data = {
+            'server_id': server_id,
+            'panel_url': context.panel_url,
             'details': {
-                'name': f"Server {os.getenv('ServerID')}",
-                'uuid': os.getenv('ServerID'),
+                'name': f"Server {server_id}",
+                'uuid': server_id,
                 'limits': {'memory': 0, 'disk': 0}
             },
             'stats': {
@@ -103,6 +140,7 @@ async def get_stats(client, config, return_data=False):
             },
             'timestamp': int(time.time() * 1000)
         }
+        record_state(fallback_data, state_cache, config)
         
         if return_data:
             return fallback_data
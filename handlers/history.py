@@ -0,0 +1,326 @@
+import asyncio
+import os
+import struct
+from array import array
+from colorama import Fore
+from .perf import PERF
+
+# Columns recorded for every sample, in on-disk order
+METRICS = (
+    'memory_bytes',
+    'cpu_absolute',
+    'disk_bytes',
+    'network_rx_bytes',
+    'network_tx_bytes',
+    'uptime'
+)
+
+# Gauges are averaged when rolled up, counters keep their last value
+LAST_VALUE_METRICS = {'network_rx_bytes', 'network_tx_bytes', 'uptime'}
+
+# Rollup tiers: name -> bucket width in seconds
+TIERS = {'1m': 60, '1h': 3600}
+
+FILE_MAGIC = b'PSSH'
+FILE_VERSION = 2
+HEADER = struct.Struct('<4sHH')
+RING_HEADER = struct.Struct('<III')
+# One slot on disk: timestamp followed by every metric, so a new sample is a single small write
+ROW = struct.Struct(f"<q{len(METRICS)}d")
+# A tier's unfinished bucket: start, sample count, sums and last values
+ROLLUP_STATE = struct.Struct(f"<qI{2 * len(METRICS)}d")
+
+class RingBuffer:
+    """Fixed-capacity, array-backed columns of (timestamp, metrics...) samples"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.head = 0
+        self.count = 0
+        self.timestamps = array('q', bytes(8 * capacity))
+        self.columns = [array('d', bytes(8 * capacity)) for _ in METRICS]
+        # Slots appended since the ring was last written
+        self.dirty = set()
+
+    @property
+    def size(self):
+        """Bytes the ring takes on disk"""
+        return RING_HEADER.size + ROW.size * self.capacity
+
+    def append(self, timestamp, values):
+        index = self.head
+        self.timestamps[index] = timestamp
+        for column, value in zip(self.columns, values):
+            column[index] = value
+        self.dirty.add(index)
+        self.head = (index + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def indexes(self):
+        """Slot indexes from oldest to newest"""
+        start = (self.head - self.count) % self.capacity
+        return [(start + i) % self.capacity for i in range(self.count)]
+
+    def samples(self):
+        """Return samples oldest first as (timestamp_ms, {metric: value})"""
+        return [
+            (self.timestamps[i], {metric: column[i] for metric, column in zip(METRICS, self.columns)})
+            for i in self.indexes()
+        ]
+
+    def to_bytes(self):
+        """The header followed by every slot as one row"""
+        width = len(METRICS) + 1
+        rows = array('q', bytes(8 * width * self.capacity))
+        rows[0::width] = self.timestamps
+        for i, column in enumerate(self.columns, 1):
+            rows[i::width] = array('q', column.tobytes())
+        self.dirty.clear()
+        return RING_HEADER.pack(self.capacity, self.head, self.count) + rows.tobytes()
+
+    def patches(self, offset):
+        """Return (file offset, bytes) writes that bring the ring stored at offset up to date"""
+        slots = sorted(self.dirty)
+        self.dirty.clear()
+        patches = []
+        start = 0
+        # Consecutive slots go out as one write
+        for end in range(1, len(slots) + 1):
+            if end == len(slots) or slots[end] != slots[end - 1] + 1:
+                rows = b''.join(self._row(i) for i in slots[start:end])
+                patches.append((offset + RING_HEADER.size + ROW.size * slots[start], rows))
+                start = end
+        patches.append((offset, RING_HEADER.pack(self.capacity, self.head, self.count)))
+        return patches
+
+    def _row(self, i):
+        return ROW.pack(self.timestamps[i], *(column[i] for column in self.columns))
+
+    @classmethod
+    def from_bytes(cls, data, offset, capacity, version=FILE_VERSION):
+        """Read a ring at offset, resizing it to capacity; returns (ring, next_offset)"""
+        stored_capacity, head, count = RING_HEADER.unpack_from(data, offset)
+        offset += RING_HEADER.size
+        end = offset + 8 * (len(METRICS) + 1) * stored_capacity
+        block = data[offset:end]
+        if len(block) != end - offset:
+            raise ValueError("Truncated history file")
+        offset = end
+
+        stored = cls(stored_capacity)
+        stored.head, stored.count = head, count
+        if version == 1:
+            # Version 1 stored one column after the other
+            size = 8 * stored_capacity
+            stored.timestamps = array('q', block[:size])
+            stored.columns = [array('d', block[size * i:size * (i + 1)]) for i in range(1, len(METRICS) + 1)]
+        else:
+            width = len(METRICS) + 1
+            stored.timestamps = array('q', block)[0::width]
+            values = array('d', block)
+            stored.columns = [values[i::width] for i in range(1, width)]
+
+        if stored_capacity == capacity:
+            return stored, offset
+
+        # Retention changed: keep the newest samples that still fit
+        ring = cls(capacity)
+        for i in stored.indexes()[-capacity:]:
+            ring.append(stored.timestamps[i], [column[i] for column in stored.columns])
+        return ring, offset
+
+class Rollup:
+    """Accumulates samples into fixed-width time buckets and emits one sample per bucket"""
+
+    def __init__(self, width_seconds, capacity):
+        self.width = width_seconds * 1000
+        self.ring = RingBuffer(capacity)
+        self.bucket = None
+        self.sums = [0.0] * len(METRICS)
+        self.last = [0.0] * len(METRICS)
+        self.samples = 0
+
+    def add(self, timestamp, values):
+        bucket = timestamp - timestamp % self.width
+        if self.bucket is not None and bucket != self.bucket:
+            self._emit()
+        self.bucket = bucket
+        for i, value in enumerate(values):
+            self.sums[i] += value
+            self.last[i] = value
+        self.samples += 1
+
+    def _emit(self):
+        values = [
+            self.last[i] if metric in LAST_VALUE_METRICS else self.sums[i] / self.samples
+            for i, metric in enumerate(METRICS)
+        ]
+        self.ring.append(self.bucket, values)
+        self.sums = [0.0] * len(METRICS)
+        self.samples = 0
+
+    def state_bytes(self):
+        return ROLLUP_STATE.pack(self.bucket or 0, self.samples, *self.sums, *self.last)
+
+    def load_state(self, data, offset):
+        """Restore the unfinished bucket stored at offset; returns the next offset"""
+        state = ROLLUP_STATE.unpack_from(data, offset)
+        if state[1]:
+            self.bucket, self.samples = state[0], state[1]
+            self.sums = list(state[2:2 + len(METRICS)])
+            self.last = list(state[2 + len(METRICS):])
+        return offset + ROLLUP_STATE.size
+
+class ServerHistory:
+    """Raw samples plus rolled-up tiers for one server"""
+
+    def __init__(self, retention):
+        self.raw = RingBuffer(retention['raw'])
+        self.rollups = {tier: Rollup(width, retention[tier]) for tier, width in TIERS.items()}
+        # The whole file has to be written: it is new, resized or in an older format
+        self.rewrite = True
+
+    @property
+    def size(self):
+        """Bytes the file takes on disk"""
+        return HEADER.size + self.raw.size + sum(rollup.ring.size + ROLLUP_STATE.size for rollup in self.rollups.values())
+
+    def append(self, timestamp, values):
+        self.raw.append(timestamp, values)
+        for rollup in self.rollups.values():
+            rollup.add(timestamp, values)
+
+    def ring(self, tier):
+        return self.raw if tier == 'raw' else self.rollups[tier].ring
+
+    def to_bytes(self):
+        parts = [HEADER.pack(FILE_MAGIC, FILE_VERSION, len(METRICS)), self.raw.to_bytes()]
+        for tier in TIERS:
+            rollup = self.rollups[tier]
+            parts += [rollup.ring.to_bytes(), rollup.state_bytes()]
+        self.rewrite = False
+        return b''.join(parts)
+
+    def patches(self):
+        """Return the (file offset, bytes) writes for everything appended since the last write"""
+        offset = HEADER.size
+        patches = self.raw.patches(offset)
+        offset += self.raw.size
+        for tier in TIERS:
+            rollup = self.rollups[tier]
+            patches += rollup.ring.patches(offset)
+            offset += rollup.ring.size
+            patches.append((offset, rollup.state_bytes()))
+            offset += ROLLUP_STATE.size
+        return patches
+
+    @classmethod
+    def from_bytes(cls, data, retention):
+        magic, version, metrics = HEADER.unpack_from(data, 0)
+        if magic != FILE_MAGIC or version not in (1, FILE_VERSION) or metrics != len(METRICS):
+            raise ValueError("Unsupported history file")
+        history = cls(retention)
+        history.raw, offset = RingBuffer.from_bytes(data, HEADER.size, retention['raw'], version)
+        for tier in TIERS:
+            rollup = history.rollups[tier]
+            rollup.ring, offset = RingBuffer.from_bytes(data, offset, retention[tier], version)
+            if version > 1:
+                offset = rollup.load_state(data, offset)
+        # Patch the file in place only if its layout is exactly what would be written now
+        history.rewrite = version != FILE_VERSION or len(data) != history.size
+        return history
+
+class HistoryStore:
+    """On-disk time series of resource samples, one binary file of ring buffers per server"""
+
+    def __init__(self, path="history", retention=None, flush_interval=60):
+        self.path = path
+        self.retention = {'raw': 360, '1m': 1440, '1h': 720}
+        self.retention.update({tier: int(size) for tier, size in (retention or {}).items() if tier in self.retention})
+        self.flush_interval = flush_interval
+        self._servers = {}
+        self._dirty = set()
+        self._flush_task = None
+
+    def _file(self, server_id):
+        return os.path.join(self.path, f"{server_id}.bin")
+
+    def _history(self, server_id):
+        history = self._servers.get(server_id)
+        if history is None:
+            history = self._load(server_id)
+            self._servers[server_id] = history
+        return history
+
+    def _load(self, server_id):
+        try:
+            with open(self._file(server_id), 'rb') as f:
+                return ServerHistory.from_bytes(f.read(), self.retention)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, struct.error):
+            print(f"{Fore.CYAN}[PSS] {Fore.RED}Something went wrong with history data for server {server_id}, starting over...")
+        return ServerHistory(self.retention)
+
+    def append(self, server_id, timestamp, resources):
+        """Record one resource sample (timestamp in milliseconds) and schedule a batched write"""
+        history = self._history(server_id)
+        raw = history.raw
+        # Re-used data (a server that was not polled this tick) is not a new sample
+        if raw.count and raw.timestamps[(raw.head - 1) % raw.capacity] >= timestamp:
+            return
+        values = [float(resources.get(metric) or 0) for metric in METRICS]
+        history.append(int(timestamp), values)
+        self._dirty.add(server_id)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    def series(self, server_id, tier='raw'):
+        """Return samples for a server oldest first as (timestamp_ms, {metric: value})"""
+        return self._history(server_id).ring(tier).samples()
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self):
+        """Write every changed server file off the event loop"""
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, set()
+        # Serialise on the loop so the worker thread never sees a half-appended ring
+        payloads = {}
+        for server_id in dirty:
+            history = self._servers[server_id]
+            payloads[server_id] = history.to_bytes() if history.rewrite else history.patches()
+        try:
+            with PERF.span('cache_write', store='history', servers=len(payloads)):
+                failed = await asyncio.to_thread(self._write, payloads)
+        except Exception as error:
+            failed = dirty
+            print(f"{Fore.CYAN}[PSS] {Fore.RED}Error writing history data: {error}")
+        for server_id in failed:
+            # The pending slots were handed over already, so write the whole file next time
+            self._servers[server_id].rewrite = True
+            self._dirty.add(server_id)
+
+    def _write(self, payloads):
+        """Write new files whole and patch existing ones in place; returns the servers whose file went missing"""
+        os.makedirs(self.path, exist_ok=True)
+        missing = []
+        for server_id, payload in payloads.items():
+            path = self._file(server_id)
+            if isinstance(payload, bytes):
+                with open(f"{path}.tmp", 'wb') as f:
+                    f.write(payload)
+                os.replace(f"{path}.tmp", path)
+                continue
+            try:
+                with open(path, 'r+b') as f:
+                    for offset, data in payload:
+                        f.seek(offset)
+                        f.write(data)
+            except FileNotFoundError:
+                missing.append(server_id)
+        return missing
@@ -0,0 +1,33 @@
+from urllib.parse import urlencode
+from .get_server_details import parse_server_details
+
+# Largest page the client API serves
+PAGE_SIZE = 100
+
+async def list_servers(panel, config, wanted=None):
+    """Page through /api/client and return [(identifier, details)] for every server the key can see
+
+    With `wanted` (server IDs or short identifiers), paging stops as soon as
+    all of them have been seen.
+    """
+    remaining = set(wanted) if wanted is not None else None
+    servers = []
+    page = 1
+    while True:
+        query = {'page': page, 'per_page': PAGE_SIZE}
+        # e.g. "admin-all" lets an admin key list servers it is not a subuser of
+        if config.get('discovery.type'):
+            query['type'] = config.get('discovery.type')
+        data = await panel.get(f"/api/client?{urlencode(query)}")
+
+        for item in data.get('data') or []:
+            attributes = item['attributes']
+            servers.append((attributes.get('identifier'), parse_server_details(attributes)))
+            if remaining is not None:
+                remaining.discard(attributes['uuid'])
+                remaining.discard(attributes.get('identifier'))
+
+        pagination = (data.get('meta') or {}).get('pagination') or {}
+        if page >= pagination.get('total_pages', 1) or remaining == set():
+            return servers
+        page += 1
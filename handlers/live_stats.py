@@ -0,0 +1,129 @@
+import asyncio
+import json
+import random
+import time
+import aiohttp
+from colorama import Fore
+
+class LiveStats:
+    """Keeps the latest resource snapshot of each server from the panel's websocket stream"""
+
+    def __init__(self, config, max_age=30):
+        self.config = config
+        # A running server streams stats every few seconds; older snapshots are not trusted
+        self.max_age = max_age
+        self._snapshots = {}
+        self._tasks = {}
+
+    def sync(self, contexts):
+        """Open a socket for every monitored server and close the ones no longer monitored"""
+        wanted = {context.server_id: context for context in contexts}
+        for server_id in list(self._tasks):
+            if server_id not in wanted:
+                self._tasks.pop(server_id).cancel()
+                self._snapshots.pop(server_id, None)
+        for server_id, context in wanted.items():
+            task = self._tasks.get(server_id)
+            if task is None or task.done():
+                self._tasks[server_id] = asyncio.create_task(self._run(context))
+
+    def snapshot(self, server_id):
+        """Return the live stats of a server, or None if the caller should poll instead"""
+        entry = self._snapshots.get(server_id)
+        if entry is None:
+            return None
+        stats, received_at = entry
+        # Stopped servers stop streaming, but the socket still pushes state changes
+        if stats['current_state'] == 'offline' or time.monotonic() - received_at < self.max_age:
+            return stats
+        return None
+
+    async def _run(self, context):
+        attempt = 0
+        while True:
+            try:
+                await self._stream(context)
+                attempt = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                if self.config.get('log_error'):
+                    print(f"Websocket error for server {context.server_id}: {error}")
+            finally:
+                # Polling takes over until the socket is back
+                self._snapshots.pop(context.server_id, None)
+
+            attempt += 1
+            await asyncio.sleep(min(60, 2 ** attempt) + random.uniform(0, 1))
+
+    async def _credentials(self, panel, server_id):
+        # server_id keeps the UUID out of the metrics route label and goes through the server's breaker
+        data = await panel.get(f"/api/client/servers/{server_id}/websocket", server_id=server_id)
+        return data['data']['token'], data['data']['socket']
+
+    async def _stream(self, context):
+        server_id = context.server_id
+        panel = context.panel(self.config)
+        token, socket_url = await self._credentials(panel, server_id)
+
+        # The socket is authenticated by the token alone, the panel key stays with the panel
+        async with panel.socket_session.ws_connect(socket_url, headers={"Origin": panel.panel_url}, heartbeat=30) as ws:
+            await ws.send_json({"event": "auth", "args": [token]})
+            streaming = False
+            async for message in ws:
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    break
+                payload = json.loads(message.data)
+                event = payload.get('event')
+                args = payload.get('args') or []
+
+                if event == 'auth success' and not streaming:
+                    # Also sent after every token refresh, only subscribe once
+                    streaming = True
+                    print(f"{Fore.CYAN}[PSS] {Fore.GREEN}Live stats connected for server ID: {server_id}")
+                    await ws.send_json({"event": "send stats", "args": [None]})
+                elif event == 'stats' and args:
+                    self._store_stats(server_id, json.loads(args[0]))
+                elif event == 'status' and args:
+                    self._store_state(server_id, args[0])
+                elif event == 'token expiring':
+                    token, _ = await self._credentials(panel, server_id)
+                    await ws.send_json({"event": "auth", "args": [token]})
+                elif event in ('token expired', 'jwt error'):
+                    # Reconnect with fresh credentials
+                    break
+
+    def _store_stats(self, server_id, stats):
+        network = stats.get('network') or {}
+        self._snapshots[server_id] = ({
+            'current_state': stats.get('state', 'offline'),
+            'is_suspended': False,
+            'resources': {
+                'memory_bytes': stats.get('memory_bytes', 0),
+                'cpu_absolute': stats.get('cpu_absolute', 0),
+                'disk_bytes': stats.get('disk_bytes', 0),
+                'network_rx_bytes': network.get('rx_bytes', 0),
+                'network_tx_bytes': network.get('tx_bytes', 0),
+                'uptime': stats.get('uptime', 0)
+            }
+        }, time.monotonic())
+
+    def _store_state(self, server_id, state):
+        entry = self._snapshots.get(server_id)
+        if entry is None:
+            # No stats streamed yet, e.g. a server that is already stopped
+            self._store_stats(server_id, {'state': state})
+            return
+        stats = dict(entry[0], current_state=state)
+        if state == 'offline':
+            stats['resources'] = dict(stats['resources'], cpu_absolute=0, memory_bytes=0, uptime=0)
+        self._snapshots[server_id] = (stats, time.monotonic())
+
+    async def close(self):
+        """Close every socket"""
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        self._snapshots.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
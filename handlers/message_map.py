@@ -0,0 +1,56 @@
+import json
+import os
+from colorama import Fore
+from .perf import PERF
+
+class MessageMap:
+    """Persisted mapping of server ID to the Discord message that shows its stats"""
+    
+    def __init__(self, path="messages.json"):
+        self.path = path
+        self.channel_id = None
+        self.messages = {}
+        # True once existing channel messages have been adopted for this channel
+        self.resolved = False
+        self._load()
+    
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self.channel_id = data.get('channel_id')
+            self.messages = {str(k): int(v) for k, v in data.get('messages', {}).items()}
+            self.resolved = True
+        except (OSError, ValueError, AttributeError):
+            print(f"{Fore.CYAN}[PSS] {Fore.RED}Something went wrong with the message map, it will be rebuilt...")
+            self.channel_id = None
+            self.messages = {}
+    
+    def bind(self, channel_id):
+        """Point the map at a channel, forgetting messages that belong to another one"""
+        if self.channel_id != channel_id:
+            self.channel_id = channel_id
+            self.messages = {}
+            self.resolved = False
+    
+    def get(self, key):
+        return self.messages.get(key)
+    
+    def set(self, key, message_id):
+        self.messages[key] = message_id
+    
+    def pop(self, key):
+        return self.messages.pop(key, None)
+    
+    def keys(self):
+        return list(self.messages)
+    
+    def save(self):
+        """Atomically write the map to disk"""
+        with PERF.span('cache_write', store='messages'):
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'channel_id': self.channel_id, 'messages': self.messages}, f)
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,179 @@
+import logging
+from aiohttp import web
+from colorama import Fore
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class Metric:
+    """A named metric family whose samples are keyed by label values"""
+
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def clear(self):
+        self._values.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in self._values.items():
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {value}")
+        return lines
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = value
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = [[0] * len(self.buckets), 0, 0.0]
+        counts = entry[0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        entry[1] += 1
+        entry[2] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, (counts, count, total) in self._values.items():
+            for bound, bucket_count in zip(self.buckets, counts):
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {bucket_count}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {count}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+        return lines
+
+class Registry:
+    """Holds every metric and renders them in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = Registry()
+
+# Per-server stats, refreshed every tick
+SERVER_LABELS = ('server_id', 'name')
+SERVER_UP = REGISTRY.register(Gauge('pss_server_up', "1 if the server is starting or running", SERVER_LABELS))
+SERVER_MEMORY = REGISTRY.register(Gauge('pss_server_memory_bytes', "Memory used by the server", SERVER_LABELS))
+SERVER_MEMORY_LIMIT = REGISTRY.register(Gauge('pss_server_memory_limit_bytes', "Memory limit of the server, 0 for unlimited", SERVER_LABELS))
+SERVER_DISK = REGISTRY.register(Gauge('pss_server_disk_bytes', "Disk used by the server", SERVER_LABELS))
+SERVER_DISK_LIMIT = REGISTRY.register(Gauge('pss_server_disk_limit_bytes', "Disk limit of the server, 0 for unlimited", SERVER_LABELS))
+SERVER_CPU = REGISTRY.register(Gauge('pss_server_cpu_percent', "CPU load of the server", SERVER_LABELS))
+SERVER_NETWORK_RX = REGISTRY.register(Gauge('pss_server_network_rx_bytes', "Bytes received by the server", SERVER_LABELS))
+SERVER_NETWORK_TX = REGISTRY.register(Gauge('pss_server_network_tx_bytes', "Bytes sent by the server", SERVER_LABELS))
+SERVER_UPTIME = REGISTRY.register(Gauge('pss_server_uptime_seconds', "Uptime of the server", SERVER_LABELS))
+
+# Bot internals
+PANEL_REQUEST_SECONDS = REGISTRY.register(Histogram('pss_panel_request_duration_seconds', "Panel API request latency", ('route', 'status')))
+TICK_SECONDS = REGISTRY.register(Histogram('pss_tick_duration_seconds', "Duration of a full stats update", buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)))
+DISCORD_EDITS = REGISTRY.register(Counter('pss_discord_messages_total', "Stats messages by outcome (edited, sent, skipped, error)", ('result',)))
+DISCORD_RATE_LIMITS = REGISTRY.register(Counter('pss_discord_rate_limits_total', "429 responses received from Discord"))
+DETAILS_CACHE = REGISTRY.register(Counter('pss_details_cache_requests_total', "Server details lookups by result (hit, stale, miss)", ('result',)))
+
+def update_server_metrics(all_stats):
+    """Replace the per-server gauges with the stats of the latest tick"""
+    for gauge in (SERVER_UP, SERVER_MEMORY, SERVER_MEMORY_LIMIT, SERVER_DISK, SERVER_DISK_LIMIT,
+                  SERVER_CPU, SERVER_NETWORK_RX, SERVER_NETWORK_TX, SERVER_UPTIME):
+        gauge.clear()
+
+    for server_data in all_stats:
+        details = server_data['details']
+        stats = server_data['stats']
+        resources = stats['resources']
+        labels = {'server_id': server_data.get('server_id') or details['uuid'], 'name': details['name']}
+        limits = details.get('limits') or {}
+
+        SERVER_UP.set(1 if stats['current_state'] in ("starting", "running") else 0, **labels)
+        SERVER_MEMORY.set(resources.get('memory_bytes', 0), **labels)
+        SERVER_MEMORY_LIMIT.set((limits.get('memory') or 0) * 1000000, **labels)
+        SERVER_DISK.set(resources.get('disk_bytes', 0), **labels)
+        SERVER_DISK_LIMIT.set((limits.get('disk') or 0) * 1000000, **labels)
+        SERVER_CPU.set(resources.get('cpu_absolute', 0), **labels)
+        SERVER_NETWORK_RX.set(resources.get('network_rx_bytes', 0), **labels)
+        SERVER_NETWORK_TX.set(resources.get('network_tx_bytes', 0), **labels)
+        SERVER_UPTIME.set(resources.get('uptime', 0) / 1000, **labels)
+
+class RateLimitCounter(logging.Handler):
+    """Counts the 429s discord.py handles internally, it only reports them through logging"""
+
+    def emit(self, record):
+        if 'responded with 429' in str(record.msg):
+            DISCORD_RATE_LIMITS.inc()
+
+class MetricsServer:
+    """Serves /metrics from the bot's own event loop"""
+
+    def __init__(self, host='127.0.0.1', port=9464):
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def _metrics(self, request):
+        return web.Response(text=REGISTRY.render(), content_type='text/plain', charset='utf-8',
+                            headers={'X-Content-Type-Options': 'nosniff'})
+
+    async def start(self):
+        if self._runner is not None:
+            return
+        app = web.Application()
+        app.router.add_get('/metrics', self._metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logging.getLogger('discord.http').addHandler(RateLimitCounter(logging.WARNING))
+        print(f"{Fore.CYAN}[PSS] {Fore.GREEN}Metrics available at {Fore.BLUE}http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,143 @@
+import asyncio
+import time
+import aiohttp
+from .circuit_breaker import CircuitBreaker, parse_retry_after
+from .metrics import PANEL_REQUEST_SECONDS
+
+class PanelClient:
+    """Shared, connection-pooled async HTTP client for the Pterodactyl/Pelican client API"""
+
+    def __init__(self, panel_url, panel_key, timeout=5, pool_size=20, breaker_settings=None):
+        self.panel_url = (panel_url or '').rstrip('/')
+        self.panel_key = panel_key
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.headers = {
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {panel_key}"
+        }
+        self._session = None
+        self._socket_session = None
+        # One breaker for the panel host, one per server behind it
+        self.breaker_settings = breaker_settings or {}
+        self.breaker = CircuitBreaker(self.panel_url, **self.breaker_settings)
+        self._server_breakers = {}
+
+    def server_breaker(self, server_id):
+        breaker = self._server_breakers.get(server_id)
+        if breaker is None:
+            breaker = CircuitBreaker(f"server {server_id}", **self.breaker_settings)
+            self._server_breakers[server_id] = breaker
+        return breaker
+
+    @property
+    def session(self):
+        """Lazily open the keep-alive session on the running event loop"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=self._connector(),
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+
+    @property
+    def socket_session(self):
+        """Session for the node websockets: same connection settings, but the panel key is never sent to the node"""
+        if self._socket_session is None or self._socket_session.closed:
+            self._socket_session = aiohttp.ClientSession(connector=self._connector())
+        return self._socket_session
+
+    def _connector(self):
+        return aiohttp.TCPConnector(
+            limit=self.pool_size,
+            keepalive_timeout=60,
+            ttl_dns_cache=300
+        )
+
+    async def get(self, path, server_id=None):
+        """GET a panel API path and return the decoded JSON body
+
+        Raises CircuitOpenError without calling the panel while the panel (or
+        the given server) is backing off after repeated failures.
+        """
+        server_breaker = self.server_breaker(server_id) if server_id else None
+        if server_breaker:
+            server_breaker.check()
+        self.breaker.check()
+        if server_breaker:
+            server_breaker.begin()
+        self.breaker.begin()
+
+        route = path.split('?', 1)[0]
+        if server_id:
+            route = route.replace(server_id, '{server}')
+        status = 'error'
+        started = time.perf_counter()
+        try:
+            async with self.session.get(f"{self.panel_url}{path}") as response:
+                status = response.status
+                if response.status == 429:
+                    # The panel is rate limiting this key, back off as long as it asks
+                    self.breaker.record_failure(parse_retry_after(response.headers.get('Retry-After')))
+                    if server_breaker:
+                        server_breaker.release()
+                elif response.status >= 500 or response.status == 404:
+                    # The panel answered, the problem is this server (or its node)
+                    self.breaker.record_success()
+                    if server_breaker:
+                        server_breaker.record_failure()
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+        except aiohttp.ClientResponseError:
+            # Outcome already recorded above; other 4xx say nothing about health
+            self.breaker.release()
+            if server_breaker:
+                server_breaker.release()
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            # Unreachable or too slow: count it against the panel
+            self.breaker.record_failure()
+            if server_breaker:
+                server_breaker.release()
+            raise
+        except (Exception, asyncio.CancelledError):
+            # Cancelled by us (e.g. a revalidation dropped by invalidate()) says nothing about the panel
+            self.breaker.release()
+            if server_breaker:
+                server_breaker.release()
+            raise
+        finally:
+            PANEL_REQUEST_SECONDS.observe(time.perf_counter() - started, route=route, status=status)
+
+        self.breaker.record_success()
+        if server_breaker:
+            server_breaker.record_success()
+        return data
+
+    async def close(self):
+        """Close the underlying session and its pooled connections"""
+        for session in (self._session, self._socket_session):
+            if session is not None and not session.closed:
+                await session.close()
+        self._session = None
+        self._socket_session = None
+
+# One pool per panel URL/key pair, shared by every fetcher
+_clients = {}
+
+def get_panel_client(panel_url, panel_key, timeout=5, pool_size=20, breaker_settings=None):
+    """Return the shared PanelClient for a panel, creating it on first use"""
+    key = (panel_url, panel_key)
+    client = _clients.get(key)
+    if client is None:
+        client = PanelClient(panel_url, panel_key, timeout=timeout, pool_size=pool_size, breaker_settings=breaker_settings)
+        _clients[key] = client
+    return client
+
+async def close_panel_clients():
+    """Close every shared panel client"""
+    clients = list(_clients.values())
+    _clients.clear()
+    await asyncio.gather(*(client.close() for client in clients), return_exceptions=True)
@@ -0,0 +1,49 @@
+import os
+from .server_context import ServerContext
+
+class Panel:
+    """A panel to monitor: where it is, its API key, its servers and how hard it may be queried"""
+
+    __slots__ = ('name', 'url', 'key', 'server_ids', 'pool_size', 'concurrency')
+
+    def __init__(self, name, url, key, server_ids, pool_size=20, concurrency=10):
+        self.name = name
+        self.url = (url or '').rstrip('/')
+        self.key = key
+        self.server_ids = list(server_ids)
+        self.pool_size = pool_size
+        self.concurrency = max(1, int(concurrency))
+
+    def context(self, server_id=None):
+        return ServerContext(server_id, self.url, self.key, pool_size=self.pool_size)
+
+    def contexts(self):
+        return [self.context(server_id) for server_id in self.server_ids]
+
+    def __repr__(self):
+        return f"Panel({self.name!r}, {self.url!r}, {len(self.server_ids)} servers)"
+
+def panel_name(entry, index):
+    """Name of the entry at `index` under `panels`"""
+    return entry.get('name') or f"panel {index + 1}"
+
+def load_panels(config, server_ids):
+    """The PanelURL/PanelKEY panel with `server_ids`, followed by every entry under `panels`"""
+    pool_size = config.get('pool_size', 20)
+    concurrency = config.get('concurrency', 10)
+    panels = []
+    if os.getenv('PanelURL'):
+        panels.append(Panel('default', os.getenv('PanelURL'), os.getenv('PanelKEY'), server_ids, pool_size, concurrency))
+
+    for index, entry in enumerate(config.get('panels') or []):
+        # Keys can stay in .env: `key_env: PANEL_EU_KEY`
+        key = entry.get('key') or os.getenv(entry.get('key_env') or '')
+        panels.append(Panel(
+            panel_name(entry, index),
+            entry['url'],
+            key,
+            entry.get('server_ids') or [],
+            entry.get('pool_size', pool_size),
+            entry.get('concurrency', concurrency)
+        ))
+    return panels
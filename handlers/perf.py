@@ -0,0 +1,90 @@
+import json
+import math
+import time
+from collections import deque
+from contextlib import contextmanager
+from colorama import Fore
+
+# Phases of a tick, in the order they happen
+PHASES = ('tick', 'discovery', 'fetch_details', 'fetch_resources', 'render', 'discord_edit', 'cache_write')
+
+class Perf:
+    """Rolling timings of the hot path, with an optional JSON-lines trace file"""
+    
+    def __init__(self, window=500, trace_file=None):
+        self.window = window
+        self._samples = {}
+        self._trace = None
+        self.configure(window, trace_file)
+    
+    def configure(self, window=500, trace_file=None):
+        """Resize the rolling window and (re)open the trace file"""
+        self.window = window
+        self._samples = {phase: deque(samples, maxlen=window) for phase, samples in self._samples.items()}
+        self.close()
+        if trace_file:
+            try:
+                self._trace = open(trace_file, 'a', encoding='utf-8')
+            except OSError as error:
+                print(f"{Fore.CYAN}[PSS] {Fore.RED}Could not open perf trace file {trace_file}: {error}")
+    
+    @contextmanager
+    def span(self, phase, **attrs):
+        """Time the body of a with-block as one sample of `phase`"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - started, **attrs)
+    
+    def record(self, phase, seconds, **attrs):
+        samples = self._samples.get(phase)
+        if samples is None:
+            samples = self._samples[phase] = deque(maxlen=self.window)
+        samples.append(seconds)
+        if self._trace is not None:
+            self._trace.write(json.dumps({'ts': time.time(), 'phase': phase, 'ms': round(seconds * 1000, 3), **attrs}) + '\n')
+    
+    def summary(self):
+        """Return {phase: {count, p50, p95, p99, max}} in milliseconds over the rolling window"""
+        result = {}
+        phases = [phase for phase in PHASES if phase in self._samples]
+        phases += [phase for phase in self._samples if phase not in PHASES]
+        for phase in phases:
+            values = sorted(self._samples[phase])
+            if not values:
+                continue
+            result[phase] = {
+                'count': len(values),
+                'p50': percentile(values, 50) * 1000,
+                'p95': percentile(values, 95) * 1000,
+                'p99': percentile(values, 99) * 1000,
+                'max': values[-1] * 1000
+            }
+        return result
+    
+    def format_summary(self):
+        """Render the summary as a fixed-width table"""
+        summary = self.summary()
+        if not summary:
+            return "No timings recorded yet."
+        lines = [f"{'phase':<16}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        for phase, row in summary.items():
+            lines.append(f"{phase:<16}{row['count']:>6}{row['p50']:>10.1f}{row['p95']:>10.1f}{row['p99']:>10.1f}{row['max']:>10.1f}")
+        return "\n".join(lines)
+    
+    def flush(self):
+        if self._trace is not None:
+            self._trace.flush()
+    
+    def close(self):
+        if self._trace is not None:
+            self._trace.close()
+            self._trace = None
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+PERF = Perf()
@@ -0,0 +1,69 @@
+import time
+
+# States in which nothing interesting happens until someone starts the server
+IDLE_STATES = ("offline", "missing")
+
+class PollScheduler:
+    """Adaptive per-server polling intervals between `polling.min` and `polling.max` seconds
+    
+    Only idle servers back off all the way to `polling.max`; a running server
+    can crash at any time, so it stays within `polling.max_running`.
+    """
+    
+    def __init__(self, config):
+        self.config = config
+        self._intervals = {}
+        self._next_due = {}
+    
+    def bounds(self, server_id):
+        """Return the (min, max, max while running) intervals of a server, honouring per-server overrides"""
+        overrides = self.config.get('polling.servers', {}) or {}
+        server = overrides.get(server_id) or {}
+        refresh = self.config.get('refresh', 10)
+        # The stats loop cannot poll faster than it ticks
+        minimum = max(refresh, server.get('min', self.config.get('polling.min', refresh)))
+        maximum = max(minimum, server.get('max', self.config.get('polling.max', refresh * 12)))
+        running = server.get('max_running', self.config.get('polling.max_running', minimum * 2))
+        return minimum, maximum, min(maximum, max(minimum, running))
+    
+    def is_due(self, server_id):
+        """Return True if a server should be polled on this tick"""
+        return time.monotonic() >= self._next_due.get(server_id, 0)
+    
+    def record(self, server_id, data, previous):
+        """Pick the next interval for a server from its latest and previous data"""
+        minimum, maximum, running_maximum = self.bounds(server_id)
+        interval = self._intervals.get(server_id, minimum)
+        
+        if previous is None or self._state(data) != self._state(previous):
+            # Something happened, watch closely
+            interval = minimum
+        elif self._state(data) in IDLE_STATES:
+            interval = min(maximum, interval * 2)
+        elif self._signature(data) == self._signature(previous):
+            # Steady, but a crash must still be noticed quickly
+            interval = min(running_maximum, interval * 2)
+        else:
+            interval = minimum
+        
+        self._intervals[server_id] = interval
+        # Small slack so a server due "just after" this tick is not pushed a whole tick back
+        self._next_due[server_id] = time.monotonic() + interval - 1
+    
+    def forget(self, server_id):
+        self._intervals.pop(server_id, None)
+        self._next_due.pop(server_id, None)
+    
+    @staticmethod
+    def _state(data):
+        return data['stats']['current_state']
+    
+    @staticmethod
+    def _signature(data):
+        """Coarse view of the resources, so jitter does not count as a change"""
+        resources = data['stats']['resources']
+        return (
+            round(resources.get('cpu_absolute', 0)),
+            resources.get('memory_bytes', 0) // 10_000_000,
+            resources.get('disk_bytes', 0) // 10_000_000
+        )
@@ -0,0 +1,56 @@
+from bisect import bisect_right
+from .uptime_formatter import format_uptime
+
+# Decimal units of humanize.naturalsize; a value below SIZE_UNITS[i] is shown in SIZE_SUFFIXES[i]
+SIZE_SUFFIXES = (" kB", " MB", " GB", " TB", " PB", " EB", " ZB", " YB")
+SIZE_UNITS = tuple(1000 ** (i + 2) for i in range(len(SIZE_SUFFIXES)))
+LAST_UNIT = len(SIZE_UNITS) - 1
+
+def format_size(value):
+    """Same output as humanize.naturalsize(value), without the per-call suffix search"""
+    value = float(value)
+    abs_value = abs(value)
+    if abs_value == 1:
+        return "%d Byte" % value
+    if abs_value < 1000:
+        return "%d Bytes" % value
+    index = min(bisect_right(SIZE_UNITS, abs_value), LAST_UNIT)
+    return "%.1f" % (1000 * value / SIZE_UNITS[index]) + SIZE_SUFFIXES[index]
+
+class ResourceFormatter:
+    """Formats the resource fields of every server in a tick in one pass"""
+
+    def __init__(self, memo_size=4096):
+        # Limits and idle servers repeat the same values tick after tick
+        self.memo_size = memo_size
+        self._sizes = {}
+
+    def size(self, value):
+        text = self._sizes.get(value)
+        if text is None:
+            if len(self._sizes) >= self.memo_size:
+                self._sizes.clear()
+            text = self._sizes[value] = format_size(value)
+        return text
+
+    def limit(self, megabytes):
+        return "∞" if megabytes == 0 else self.size(megabytes * 1000000)
+
+    def format(self, all_stats):
+        """Return the display strings of each server's resources, in the order of all_stats"""
+        resources = [server_data['stats']['resources'] for server_data in all_stats]
+        limits = [server_data['details'].get('limits') or {} for server_data in all_stats]
+        size, limit = self.size, self.limit
+        columns = {
+            'memory_used': [size(r.get('memory_bytes', 0)) for r in resources],
+            'memory_limit': [limit(l.get('memory', 0)) for l in limits],
+            'disk_used': [size(r.get('disk_bytes', 0)) for r in resources],
+            'disk_limit': [limit(l.get('disk', 0)) for l in limits],
+            'network_rx': [size(r.get('network_rx_bytes', 0)) for r in resources],
+            'network_tx': [size(r.get('network_tx_bytes', 0)) for r in resources],
+            'uptime': [format_uptime(r.get('uptime', 0)) for r in resources]
+        }
+        names = tuple(columns)
+        return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+FORMATTER = ResourceFormatter()
@@ -1,4 +1,3 @@
-import json
 import os
 import discord
 from discord.ext import commands
@@ -6,56 +5,40 @@ from datetime import datetime, timezone
 from colorama import Fore
 from humanize import naturalsize
 from .uptime_formatter import format_uptime
-from .webhook import send_webhook_notification
+from .message_map import MessageMap
+from .send_message_for_all import get_channel
+from .metrics import DISCORD_RATE_LIMITS
+
+# Single-server mode keeps its own map, separate from the one-message-per-server layout
+_message_map = None
+
+def get_message_map():
+    global _message_map
+    if _message_map is None:
+        _message_map = MessageMap("message.json")
+    return _message_map
 
 async def send_message(client, server_data, config):
     """Send Discord message with server stats"""
-    # Load cache to compare states
-    cache = None
-    cache_path = "cache.json"
-    
-    if os.path.exists(cache_path):
-        try:
-            with open(cache_path, 'r') as f:
-                cache = json.load(f)
-        except:
-            cache = None
-    
-    # Send webhook notifications for state changes
+    # State changes are detected and cached by get_stats
     current_state = server_data['stats']['current_state']
-    cached_state = cache['stats']['current_state'] if cache and 'stats' in cache else None
-    
-    if current_state == "missing" and cached_state != "missing":
-        # Server went down
-        embed = discord.Embed(
-            title="Server down",
-            description=f"Server `{server_data['details']['name']}` is down.",
-            color=0xED4245
-        )
-        send_webhook_notification(embed, config)
-    elif current_state != "missing" and cached_state == "missing":
-        # Server came back online
-        embed = discord.Embed(
-            title="Server online",
-            description=f"Server `{server_data['details']['name']}` is back online.",
-            color=0x57F287
-        )
-        send_webhook_notification(embed, config)
-    
-    # Save current data to cache
-    with open(cache_path, 'w') as f:
-        json.dump(server_data, f, indent=2)
     
     # Get Discord channel
     channel_id = int(os.getenv('DiscordChannel'))
-    channel = await client.fetch_channel(channel_id)
-    
-    # Find existing message from bot
-    message_to_edit = None
-    async for message in channel.history(limit=10):
-        if message.author.id == client.user.id:
-            message_to_edit = message
-            break
+    channel = await get_channel(client, channel_id)
+    message_map = get_message_map()
+    message_map.bind(channel_id)
+    key = server_data.get('server_id') or server_data['details']['uuid']
+    
+    # Find existing message from bot once, then edit it directly by ID
+    if not message_map.resolved:
+        async for message in channel.history(limit=10):
+            if message.author.id == client.user.id:
+                message_map.set(key, message.id)
+                break
+        message_map.resolved = True
+        message_map.save()
+    message_id = message_map.get(key)
     
     # Create embed
     embed = discord.Embed()
@@ -165,18 +148,27 @@ async def send_message(client, server_data, config):
     
     try:
         # Send or edit message
-        if message_to_edit:
-            await message_to_edit.edit(embed=embed)
-        else:
+        try:
+            if message_id:
+                await channel.get_partial_message(message_id).edit(embed=embed)
+        except discord.NotFound:
+            message_id = None
+        
+        if not message_id:
             content = config.get('message.content') or None
-            await channel.send(content=content, embed=embed)
+            message = await channel.send(content=content, embed=embed)
+            message_map.set(key, message.id)
+            message_map.save()
         
         print(f"{Fore.CYAN}[PSS] {Fore.GREEN}Server stats successfully posted to the {Fore.BLUE}{channel.name}{Fore.GREEN} channel!")
         
     except discord.HTTPException as error:
-        if error.code == 429:
+        if error.status == 429 or error.code == 429:
+            # Transient, the next update tries again
+            DISCORD_RATE_LIMITS.inc()
             print(f"{Fore.CYAN}[PSS] {Fore.RED}Error 429 | Your IP has been rate limited by Discord. You must wait.")
-        elif error.code == 403:
+            return
+        if error.code == 403:
             print(f"{Fore.CYAN}[PSS] {Fore.RED}FORBIDDEN | The channel ID you provided is incorrect or bot lacks permissions.")
         elif error.code == 50001:
             print(f"{Fore.CYAN}[PSS] {Fore.RED}Discord Error | Your discord bot doesn't have access to see/send message/edit message in the channel!")
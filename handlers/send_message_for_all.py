@@ -1,91 +1,209 @@
-import os
 import discord
+from functools import partial
 from datetime import datetime, timezone
 from colorama import Fore
-from humanize import naturalsize
-from .uptime_formatter import format_uptime
+from .resource_formatter import FORMATTER
+from .edit_tracker import EditTracker
+from .embed_templates import EmbedTemplates
+from .edit_scheduler import EditScheduler, PRIORITY_ROUTINE, PRIORITY_STATE_CHANGE
+from .metrics import DISCORD_EDITS
+from .perf import PERF
 
-def build_server_embed_fields(server_data, config):
-    details = server_data['details']
+def build_server_embed_fields(server_data, config, formatted=None):
+    """Build (name, value, inline) fields; `formatted` is the server's row from ResourceFormatter.format"""
+    if formatted is None:
+        formatted = FORMATTER.format([server_data])[0]
     stats = server_data['stats']
-    resources = stats['resources']
     is_online = stats.get('current_state') in ["starting", "running"]
     fields = []
+    inline = config.get('embed.fields.inline', False)
     # Status
     status_text = config.get('status.online') if is_online else config.get('status.offline')
     fields.append(("Status", status_text, False))
     # Details
     if config.get('server.details') and is_online:
         if config.get('server.memory'):
-            memory_used = naturalsize(resources['memory_bytes'])
-            memory_limit = "∞" if details['limits']['memory'] == 0 else naturalsize(details['limits']['memory'] * 1000000)
-            fields.append(("Memory Usage", f"`{memory_used}` / `{memory_limit}`", config.get('embed.fields.inline', False)))
+            fields.append(("Memory Usage", f"`{formatted['memory_used']}` / `{formatted['memory_limit']}`", inline))
         if config.get('server.disk'):
-            disk_used = naturalsize(resources['disk_bytes'])
-            disk_limit = "∞" if details['limits']['disk'] == 0 else naturalsize(details['limits']['disk'] * 1000000)
-            fields.append(("Disk Usage", f"`{disk_used}` / `{disk_limit}`", config.get('embed.fields.inline', False)))
+            fields.append(("Disk Usage", f"`{formatted['disk_used']}` / `{formatted['disk_limit']}`", inline))
         if config.get('server.cpu'):
-            cpu_usage = f"{resources['cpu_absolute']:.2f}%"
-            fields.append(("CPU Load", f"`{cpu_usage}`", config.get('embed.fields.inline', False)))
+            cpu_usage = f"{stats['resources']['cpu_absolute']:.2f}%"
+            fields.append(("CPU Load", f"`{cpu_usage}`", inline))
         if config.get('server.network'):
-            network_rx = naturalsize(resources['network_rx_bytes'])
-            network_tx = naturalsize(resources['network_tx_bytes'])
-            fields.append(("Network", f"Upload: `{network_rx}`\nDownload: `{network_tx}`", config.get('embed.fields.inline', False)))
+            fields.append(("Network", f"Upload: `{formatted['network_rx']}`\nDownload: `{formatted['network_tx']}`", inline))
         if config.get('server.uptime'):
-            uptime = format_uptime(resources['uptime'])
-            fields.append(("Uptime", f"`{uptime}`", config.get('embed.fields.inline', False)))
+            fields.append(("Uptime", f"`{formatted['uptime']}`", inline))
     return fields
 
-async def send_message_for_all(client, all_stats, config):
-    channel_id = int(os.getenv('DiscordChannel'))
-    channel = await client.fetch_channel(channel_id)
-    # Find existing messages from bot (one per server)
-    messages = []
-    async for message in channel.history(limit=20):
-        if message.author.id == client.user.id:
-            messages.append(message)
+async def get_channel(client, channel_id):
+    """Return a channel from the gateway cache, falling back to a single REST fetch"""
+    return client.get_channel(channel_id) or await client.fetch_channel(channel_id)
+
+# Discord limits for a single message
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARACTERS = 6000
+
+def footer_id(embed):
+    """Return the server ID shown in an embed footer, if any"""
+    footer = embed.footer.text or ''
+    if ' ID: ' not in footer:
+        return None
+    return footer.rsplit(' ID: ', 1)[1]
+
+async def adopt_messages(client, channel, message_map, units):
+    """Map units to messages the bot already posted, matched by the first footer ID (run once per channel)"""
+    by_footer = {footer_id(embeds[0]): key for key, embeds, _ in units}
+    
+    async for message in channel.history(limit=max(50, len(units) * 2)):
+        if message.author.id != client.user.id or not message.embeds:
+            continue
+        found = footer_id(message.embeds[0])
+        if found is None:
+            continue
+        key = by_footer.get(found)
+        # History is newest first, so the most recent message for a unit wins
+        if key and message_map.get(key) is None:
+            message_map.set(key, message.id)
+        else:
+            # Stats of a server that is no longer monitored, or a duplicate
+            await message.delete()
+    
+    message_map.resolved = True
+
+def pack_units(rendered, config, templates):
+    """Group rendered servers into messages of up to `message.embeds_per_message` embeds"""
+    if not config.get('message.pack', False):
+        return [
+            (key, [embed], templates.view([("Manage Server", manage_url)]))
+            for key, embed, manage_url, _ in rendered
+        ]
+    
+    per_message = min(MAX_EMBEDS_PER_MESSAGE, max(1, int(config.get('message.embeds_per_message', MAX_EMBEDS_PER_MESSAGE))))
+    groups = []
+    group, characters = [], 0
+    for item in rendered:
+        size = len(item[1])
+        if group and (len(group) >= per_message or characters + size > MAX_EMBED_CHARACTERS):
+            groups.append(group)
+            group, characters = [], 0
+        group.append(item)
+        characters += size
+    if group:
+        groups.append(group)
+    
+    # Packed messages are keyed by position so a changed fleet edits in place
+    return [
+        (
+            f"pack:{index}",
+            [embed for _, embed, _, _ in group],
+            templates.view([(f"Manage {name}", manage_url) for _, _, manage_url, name in group])
+        )
+        for index, group in enumerate(groups)
+    ]
+
+def render_servers(all_stats, config, templates):
+    """Render one embed per server as (key, embed, manage_url, name), in the order of all_stats"""
+    now = datetime.now(timezone.utc)
+    description = f"Last update: <t:{int(now.timestamp())}:R>"
+    rendered = []
+    # Format the resources of every server at once
+    formatted = FORMATTER.format(all_stats)
+    for server_data, server_formatted in zip(all_stats, formatted):
+        details = server_data['details']
+        key = server_data.get('server_id') or details['uuid']
+        # Only the status and resource fields change from tick to tick
+        template = templates.get(details, config, server_data.get('panel_url'))
+        embed = template.render(build_server_embed_fields(server_data, config, server_formatted), description, now)
+        rendered.append((key, embed, template.manage_url, template.name))
+    templates.prune(server_data['details']['uuid'] for server_data in all_stats)
+    return rendered
+
+async def publish_rendered(client, channel_id, rendered, config, message_map, tracker=None, templates=None, scheduler=None):
+    """Pack already rendered servers into messages and queue their edits for one channel
     
-    embeds = []
-    for server_data in all_stats:
-        name = server_data['details']['name']
-        uuid = server_data['details']['uuid']
-        server_id = uuid # Using the actual server ID
-        
-        panel_url = os.getenv('PanelURL').rstrip('/')
-        manage_url = f"{panel_url}/server/{uuid}"
-        
-        embed = discord.Embed()
-        embed.title = f"{name} - {config.get('embed.title', 'Server Stats')}"
-        embed.description = f"Last update: <t:{int(datetime.now(timezone.utc).timestamp())}:R>"
-        embed.color = int(config.get('embed.color', '5865F2'), 16)
-        embed.timestamp = datetime.now(timezone.utc)
-        
-        # Add server fields
-        for fname, fval, finline in build_server_embed_fields(server_data, config):
-            embed.add_field(name=fname, value=fval, inline=finline)
-            
-        # Set footer with server ID
-        footer_text = config.get('embed.footer.text', 'PteroServerStats')
-        embed.set_footer(text=f"{footer_text} • ID: {server_id[:8]}...{server_id[-4:]}", 
-                        icon_url=config.get('embed.footer.icon', ''))
-        
-        # Add manage button as a view (discord.py 2.0+)
+    Without a scheduler the edits are sent before returning.
+    """
+    if templates is None:
+        templates = EmbedTemplates()
+    own_scheduler = scheduler is None
+    if own_scheduler:
+        scheduler = EditScheduler()
+    channel = await get_channel(client, channel_id)
+    message_map.bind(channel_id)
+    units = pack_units(rendered, config, templates)
+    
+    # Existing messages are looked up once; afterwards they are edited directly by ID
+    if not message_map.resolved:
+        mapped_before = dict(message_map.messages)
         try:
-            view = discord.ui.View()
-            view.add_item(discord.ui.Button(label="Manage Server", url=manage_url, style=discord.ButtonStyle.link))
-            embeds.append((embed, view))
-        except Exception:
-            embeds.append((embed, None))
-    # Edit or send messages (one per server)
+            await adopt_messages(client, channel, message_map, units)
+        except discord.HTTPException as error:
+            print(f"{Fore.CYAN}[PSS] {Fore.RED}Error reading existing messages: {error}")
+        if message_map.messages != mapped_before:
+            message_map.save()
+    
+    # Queue edits and sends, a server going up or down jumps ahead of routine refreshes
+    queued = 0
+    for key, embeds, view in units:
+        fingerprint = EditTracker.fingerprint(embeds, view) if tracker else None
+        message_id = message_map.get(key)
+        # Skip the edit if the message already shows this content
+        if message_id and tracker and not tracker.should_edit(message_id, fingerprint):
+            # An older render still waiting would undo that
+            scheduler.discard(channel_id, key)
+            DISCORD_EDITS.inc(result='skipped')
+            continue
+        status = EditTracker.status(embeds)
+        priority = PRIORITY_ROUTINE
+        if message_id and tracker and tracker.state_changed(message_id, status):
+            priority = PRIORITY_STATE_CHANGE
+        scheduler.submit(channel_id, key, partial(send_unit, channel, message_map, key, embeds, view, tracker, fingerprint, status), priority)
+        queued += 1
+    
+    # Delete messages that no longer have anything to show
+    published = {key for key, _, _ in units}
+    for key in message_map.keys():
+        if key not in published:
+            scheduler.submit(channel_id, key, partial(delete_unit, channel, message_map, key, tracker))
+    print(f"{Fore.CYAN}[PSS] {Fore.GREEN}{queued} of {len(units)} stats messages queued for {Fore.BLUE}{channel.name}{Fore.GREEN}!")
+    
+    if own_scheduler:
+        await scheduler.drain()
+        await scheduler.close()
+
+async def send_unit(channel, message_map, key, embeds, view, tracker, fingerprint, status):
+    """Publish one unit and remember what it shows"""
+    with PERF.span('discord_edit', key=key):
+        message_id = await publish_message(channel, message_map, key, embeds, view)
+    if tracker:
+        tracker.record(message_id, fingerprint, status)
+
+async def delete_unit(channel, message_map, key, tracker):
+    message_id = message_map.pop(key)
+    if message_id is None:
+        return
+    message_map.save()
     try:
-        for i, (embed, view) in enumerate(embeds):
-            if i < len(messages):
-                await messages[i].edit(embed=embed, view=view)
-            else:
-                await channel.send(embed=embed, view=view)
-        # Delete extra old messages if any
-        for j in range(len(embeds), len(messages)):
-            await messages[j].delete()
-        print(f"{Fore.CYAN}[PSS] {Fore.GREEN}One embed per server posted to {Fore.BLUE}{channel.name}{Fore.GREEN}!")
-    except Exception as error:
-        print(f"{Fore.CYAN}[PSS] {Fore.RED}Error posting server stats: {error}")
+        await channel.get_partial_message(message_id).delete()
+    except discord.NotFound:
+        pass
+    if tracker:
+        tracker.forget(message_id)
+
+async def publish_message(channel, message_map, key, embeds, view):
+    """Edit the mapped message for a unit, posting a new one if it is missing; returns the message ID"""
+    message_id = message_map.get(key)
+    if message_id:
+        try:
+            await channel.get_partial_message(message_id).edit(embeds=embeds, view=view)
+            DISCORD_EDITS.inc(result='edited')
+            return message_id
+        except discord.NotFound:
+            # The message was deleted by hand, post a replacement below
+            message_map.pop(key)
+    
+    message = await channel.send(embeds=embeds, view=view)
+    DISCORD_EDITS.inc(result='sent')
+    message_map.set(key, message.id)
+    message_map.save()
+    return message.id
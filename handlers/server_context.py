@@ -0,0 +1,30 @@
+from .panel_client import get_panel_client
+
+class ServerContext:
+    """Everything needed to query one monitored server: its ID and the panel it lives on"""
+    
+    __slots__ = ('server_id', 'panel_url', 'panel_key', 'pool_size')
+    
+    def __init__(self, server_id, panel_url, panel_key, pool_size=None):
+        self.server_id = server_id
+        self.panel_url = (panel_url or '').rstrip('/')
+        self.panel_key = panel_key
+        # Connections to keep open to this panel, defaults to `pool_size`
+        self.pool_size = pool_size
+    
+    def panel(self, config):
+        """Return the shared, pooled client for this server's panel"""
+        return get_panel_client(
+            self.panel_url,
+            self.panel_key,
+            timeout=config.get('timeout', 5),
+            pool_size=self.pool_size or config.get('pool_size', 20),
+            breaker_settings={
+                'failure_threshold': config.get('circuit_breaker.failure_threshold', 3),
+                'base_delay': config.get('circuit_breaker.base_delay', 5),
+                'max_delay': config.get('circuit_breaker.max_delay', 300)
+            }
+        )
+    
+    def __repr__(self):
+        return f"ServerContext({self.server_id!r}, {self.panel_url!r})"
@@ -1,11 +1,13 @@
 import os
 import re
 import uuid
-import requests
+import asyncio
+import aiohttp
 import discord
 from urllib.parse import urlparse
 from colorama import Fore
 from .application import Application
+from .get_server_details import print_panel_error
 
 class Setup:
     def __init__(self):
@@ -100,49 +102,44 @@ class Setup:
         
         # Test panel credentials
         try:
-            response = requests.get(
-                f"{panel_url}/api/client",
-                headers={
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {panel_key}"
-                },
-                timeout=10
-            )
-            response.raise_for_status()
+            self._panel_get(panel_url, panel_key, "/api/client")
             print(f"\n{Fore.GREEN}✓ Valid Panel Credentials.")
             
         except Exception as error:
             print(f"\n{Fore.RED}❌ Invalid Panel Credentials.")
-            self._handle_panel_error(error)
+            print_panel_error(error)
             print(f"\n{Fore.RED}Please run the setup again and fill in the correct credentials.")
             exit(1)
         
         # Test server ID
         try:
-            response = requests.get(
-                f"{panel_url}/api/client/servers/{server_id}",
-                headers={
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {panel_key}"
-                },
-                timeout=10
-            )
-            response.raise_for_status()
+            self._panel_get(panel_url, panel_key, f"/api/client/servers/{server_id}")
             print(f"{Fore.GREEN}✓ Valid Panel Server ID.")
             
         except Exception as error:
             print(f"\n{Fore.RED}❌ Invalid Server ID.")
-            self._handle_panel_error(error)
+            print_panel_error(error)
             print(f"\n{Fore.RED}Please run the setup again and fill in the correct credentials.")
             exit(1)
         
         # Test Discord credentials
         self._validate_discord_credentials(bot_token, channel_id)
     
+    def _panel_get(self, panel_url, panel_key, path):
+        """GET a panel API path, raising on any error status"""
+        async def get():
+            headers = {
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {panel_key}"
+            }
+            async with aiohttp.ClientSession(headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as session:
+                async with session.get(f"{panel_url}{path}") as response:
+                    response.raise_for_status()
+        
+        asyncio.run(get())
+    
     def _validate_discord_credentials(self, bot_token, channel_id):
         """Validate Discord bot token and channel ID"""
-        import asyncio
-        
         async def test_discord():
             try:
                 # Create temporary client to test credentials
@@ -217,34 +214,3 @@ SERVER_IDS={server_ids}"""
         
         with open(".env", "w") as f:
             f.write(env_content)
-    
-    def _handle_panel_error(self, error):
-        """Handle panel-related errors with appropriate messages"""
-        error_str = str(error).lower()
-        
-        if "name or service not known" in error_str or "nodename nor servname provided" in error_str:
-            print(f"{Fore.CYAN}[PSS] {Fore.RED}ENOTFOUND | DNS Error. Ensure your network connection and DNS server are functioning correctly.")
-        elif "connection refused" in error_str:
-            print(f"{Fore.CYAN}[PSS] {Fore.RED}ECONNREFUSED | Connection refused. Ensure the panel is running and reachable.")
-        elif "timed out" in error_str:
-            print(f"{Fore.CYAN}[PSS] {Fore.RED}ETIMEDOUT | Connection timed out. The panel took too long to respond.")
-        elif "connection reset by peer" in error_str:
-            print(f"{Fore.CYAN}[PSS] {Fore.RED}ECONNRESET | Connection reset by peer. The panel closed the connection unexpectedly.")
-        elif "no route to host" in error_str:
-            print(f"{Fore.CYAN}[PSS] {Fore.RED}EHOSTUNREACH | Host unreachable. The panel is down or not reachable.")
-        elif hasattr(error, 'response') and error.response:
-            status_code = error.response.status_code
-            if status_code == 401:
-                print(f"{Fore.CYAN}[PSS] {Fore.RED}401 | Unauthorized. Invalid Application Key or API Key doesn't have permission to perform this action.")
-            elif status_code == 403:
-                print(f"{Fore.CYAN}[PSS] {Fore.RED}403 | Forbidden. Invalid Application Key or API Key doesn't have permission to perform this action.")
-            elif status_code == 404:
-                print(f"{Fore.CYAN}[PSS] {Fore.RED}404 | Not Found. Invalid Panel URL or the Panel doesn't exist.")
-            elif status_code == 429:
-                print(f"{Fore.CYAN}[PSS] {Fore.RED}429 | Too Many Requests. You have sent too many requests in a given amount of time.")
-            elif status_code in [500, 502, 503, 504]:
-                print(f"{Fore.CYAN}[PSS] {Fore.RED}500 | Internal Server Error. This is an error with your panel, PSS is not the cause.")
-            else:
-                print(f"{Fore.CYAN}[PSS] {Fore.RED}{status_code} | Unexpected error: {getattr(error.response, 'reason', 'Unknown')}")
-        else:
-            print(f"{Fore.CYAN}[PSS] {Fore.RED}Unexpected error: {error}")
\ No newline at end of file
@@ -0,0 +1,46 @@
+import asyncio
+
+class SnapshotStore:
+    """Latest stats of every monitored server, written by ingestion and read by publishing
+
+    Only the newest snapshot of each server is kept, so publishing always
+    renders the current state however far it runs behind ingestion.
+    """
+
+    def __init__(self):
+        self._snapshots = {}
+        # Monitored server IDs in display order
+        self._order = {}
+        self.version = 0
+        self.changed = asyncio.Event()
+
+    def _touch(self):
+        self.version += 1
+        self.changed.set()
+
+    def monitor(self, server_ids):
+        """Set the servers to show, in order, and drop snapshots of every other server"""
+        order = dict.fromkeys(server_ids)
+        if list(order) == list(self._order):
+            return
+        dropped = [server_id for server_id in self._snapshots if server_id not in order]
+        for server_id in dropped:
+            del self._snapshots[server_id]
+        self._order = order
+        self._touch()
+
+    def put(self, server_id, data):
+        """Store the newest snapshot of a monitored server"""
+        if server_id not in self._order or self._snapshots.get(server_id) is data:
+            return
+        self._snapshots[server_id] = data
+        self._touch()
+
+    def snapshot(self):
+        """Return the latest snapshots in display order and mark them as seen"""
+        self.changed.clear()
+        return [self._snapshots[server_id] for server_id in self._order if server_id in self._snapshots]
+
+    async def wait(self):
+        """Wait until a snapshot changed since the last call to snapshot()"""
+        await self.changed.wait()
@@ -0,0 +1,77 @@
+import asyncio
+import json
+import os
+from colorama import Fore
+from .perf import PERF
+
+class StateCache:
+    """Last known data of every server, kept in memory and written to disk in the background"""
+    
+    def __init__(self, path="cache.json", flush_interval=5):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._servers = {}
+        self._dirty = False
+        self._flush_task = None
+        self._load()
+    
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            print(f"{Fore.CYAN}[PSS] {Fore.RED}Something went wrong with cache data...")
+            return
+        
+        if isinstance(data, dict) and isinstance(data.get('servers'), dict):
+            self._servers = data['servers']
+        elif isinstance(data, dict) and 'details' in data:
+            # Legacy single-server cache.json
+            key = data.get('server_id') or data['details'].get('uuid')
+            if key:
+                self._servers = {key: data}
+    
+    def get(self, server_id):
+        """Return the last known data for a server, or None"""
+        return self._servers.get(server_id)
+    
+    def set(self, server_id, data):
+        """Store the latest data for a server and schedule a batched write"""
+        self._servers[server_id] = data
+        self._schedule_flush()
+    
+    def remove(self, server_id):
+        """Forget a server that is no longer monitored and schedule a batched write"""
+        if self._servers.pop(server_id, None) is not None:
+            self._schedule_flush()
+    
+    def _schedule_flush(self):
+        self._dirty = True
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+    
+    async def _flush_later(self):
+        # Every update within the interval is written by one flush
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+    
+    async def flush(self):
+        """Write the cache to disk off the event loop, if anything changed"""
+        if not self._dirty:
+            return
+        self._dirty = False
+        snapshot = dict(self._servers)
+        try:
+            with PERF.span('cache_write', store='state'):
+                await asyncio.to_thread(self._write, snapshot)
+        except Exception as error:
+            self._dirty = True
+            print(f"{Fore.CYAN}[PSS] {Fore.RED}Error writing cache data: {error}")
+    
+    def _write(self, snapshot):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'servers': snapshot}, f)
+        os.replace(tmp_path, self.path)
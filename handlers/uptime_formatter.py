@@ -13,9 +13,6 @@ def format_uptime(time_ms):
     if minutes > 0:
         text.append(f"{minutes} minutes")
     
-    if len(text) > 0:
-        text.append(f"and {seconds} seconds")
-    else:
-        text.append(f"{seconds} seconds")
-    
-    return ", ".join(text).replace(", and", " and") 
\ No newline at end of file
+    if text:
+        return f"{', '.join(text)} and {seconds} seconds"
+    return f"{seconds} seconds" 
\ No newline at end of file
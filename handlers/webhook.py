@@ -1,9 +1,131 @@
-import requests
-from discord import SyncWebhook, Embed
+import asyncio
+import random
+import aiohttp
+from discord import Webhook, Embed, HTTPException
 from colorama import Fore
 
+# Discord accepts at most 10 embeds per webhook message
+MAX_EMBEDS_PER_MESSAGE = 10
+
+class WebhookNotifier:
+    """Queues webhook notifications and sends them from a background task with one reused session"""
+    
+    def __init__(self, batch_delay=1, max_retries=5, log_error=False):
+        self.batch_delay = batch_delay
+        self.max_retries = max_retries
+        self.log_error = log_error
+        self._queue = None
+        self._worker = None
+        self._session = None
+    
+    def enqueue(self, webhook_url, embed):
+        """Queue an embed for delivery without waiting for Discord"""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._queue.put_nowait((webhook_url, embed))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+    
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            # Give the rest of the tick a moment so transitions that happen
+            # together (a node outage) are delivered together
+            await asyncio.sleep(self.batch_delay)
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            
+            by_url = {}
+            for webhook_url, embed in batch:
+                by_url.setdefault(webhook_url, []).append(embed)
+            
+            for webhook_url, embeds in by_url.items():
+                for start in range(0, len(embeds), MAX_EMBEDS_PER_MESSAGE):
+                    await self._send(webhook_url, embeds[start:start + MAX_EMBEDS_PER_MESSAGE])
+    
+    async def _send(self, webhook_url, embeds):
+        """Send one webhook message, retrying with exponential backoff"""
+        try:
+            if self._session is None or self._session.closed:
+                self._session = aiohttp.ClientSession()
+            webhook = Webhook.from_url(webhook_url, session=self._session)
+        except ValueError as error:
+            print(f"{Fore.CYAN}[PSS] {Fore.RED}Invalid Webhook URL")
+            if self.log_error:
+                print(f"Webhook error: {error}")
+            return
+        
+        for attempt in range(self.max_retries):
+            try:
+                await webhook.send(embeds=embeds)
+                return
+            except HTTPException as error:
+                # Client errors other than rate limits will not fix themselves
+                if 400 <= error.status < 500 and error.status != 429:
+                    print(f"{Fore.CYAN}[PSS] {Fore.RED}Invalid Webhook URL")
+                    if self.log_error:
+                        print(f"Webhook error: {error}")
+                    return
+                last_error = error
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                last_error = error
+            
+            await asyncio.sleep(min(60, 2 ** attempt) + random.uniform(0, 1))
+        
+        print(f"{Fore.CYAN}[PSS] {Fore.RED}Webhook notification failed after {self.max_retries} attempts")
+        if self.log_error:
+            print(f"Webhook error: {last_error}")
+    
+    async def close(self):
+        """Stop the worker and close the webhook session"""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+_notifier = None
+
+def get_notifier(config):
+    """Return the shared WebhookNotifier"""
+    global _notifier
+    if _notifier is None:
+        _notifier = WebhookNotifier(
+            batch_delay=config.get('notifier.batch_delay', 1),
+            log_error=config.get('log_error', False)
+        )
+    return _notifier
+
+async def close_notifier():
+    if _notifier is not None:
+        await _notifier.close()
+
+
+def notify_state_change(server_data, previous, config):
+    """Send a webhook notification if a server went down or came back online"""
+    current_state = server_data['stats']['current_state']
+    cached_state = previous['stats']['current_state'] if previous and 'stats' in previous else None
+    
+    if current_state == "missing" and cached_state != "missing":
+        # Server went down
+        embed = Embed(
+            title="Server down",
+            description=f"Server `{server_data['details']['name']}` is down.",
+            color=0xED4245
+        )
+        send_webhook_notification(embed, config)
+    elif current_state != "missing" and cached_state == "missing":
+        # Server came back online
+        embed = Embed(
+            title="Server online",
+            description=f"Server `{server_data['details']['name']}` is back online.",
+            color=0x57F287
+        )
+        send_webhook_notification(embed, config)
+
 def send_webhook_notification(embed, config):
-    """Send webhook notification"""
+    """Queue a webhook notification, delivered in the background by the shared notifier"""
     if not config.get('notifier.enable'):
         return
     
@@ -12,9 +134,6 @@ def send_webhook_notification(embed, config):
         if not webhook_url:
             return
         
-        # Create Discord webhook using SyncWebhook
-        webhook = SyncWebhook.from_url(webhook_url)
-        
         # Create the embed with notifier configuration
         notification_embed = Embed(
             title=embed.title,
@@ -47,7 +166,7 @@ def send_webhook_notification(embed, config):
         if config.get('notifier.embed.timestamp'):
             notification_embed.timestamp = embed.timestamp
         
-        webhook.send(embed=notification_embed)
+        get_notifier(config).enqueue(webhook_url, notification_embed)
         
     except Exception as error:
         print(f"{Fore.CYAN}[PSS] {Fore.RED}Invalid Webhook URL")
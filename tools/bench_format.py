@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Microbenchmark of the resource field formatting done on every tick.
+
+Compares formatting one value at a time with humanize.naturalsize and the
+original format_uptime against ResourceFormatter.format, and checks that
+both produce exactly the same strings first:
+
+    python tools/bench_format.py --servers 1000 --repeat 20
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from humanize import naturalsize
+from handlers.resource_formatter import ResourceFormatter, format_size
+
+# Values around every unit boundary, where rounding is easiest to get wrong
+EDGE_SIZES = [0, 1, -1, 2, 999, 1000, 1001, 999_949, 999_950, 999_999, 10 ** 24, 10 ** 27, 10 ** 30, 2.5, -4096]
+EDGE_SIZES += [base * 1000 ** power + delta for power in range(1, 9) for base in (1, 999) for delta in (-1, 0, 1)]
+EDGE_UPTIMES = [0, 999, 1000, 59_999, 60_000, 3_599_999, 3_600_000, 86_399_999, 86_400_000, 90_061_001, 10 ** 12]
+
+def reference_uptime(time_ms):
+    """format_uptime as it was before the batch formatter, kept to check the output"""
+    text = []
+    days = time_ms // 86400000
+    hours = (time_ms // 3600000) % 24
+    minutes = (time_ms // 60000) % 60
+    seconds = (time_ms // 1000) % 60
+    if days > 0:
+        text.append(f"{days} days")
+    if hours > 0:
+        text.append(f"{hours} hours")
+    if minutes > 0:
+        text.append(f"{minutes} minutes")
+    if len(text) > 0:
+        text.append(f"and {seconds} seconds")
+    else:
+        text.append(f"{seconds} seconds")
+    return ", ".join(text).replace(", and", " and")
+
+def reference_format(all_stats):
+    """One value at a time, the way build_server_embed_fields used to"""
+    rows = []
+    for server_data in all_stats:
+        resources = server_data['stats']['resources']
+        limits = server_data['details']['limits']
+        rows.append({
+            'memory_used': naturalsize(resources['memory_bytes']),
+            'memory_limit': "∞" if limits['memory'] == 0 else naturalsize(limits['memory'] * 1000000),
+            'disk_used': naturalsize(resources['disk_bytes']),
+            'disk_limit': "∞" if limits['disk'] == 0 else naturalsize(limits['disk'] * 1000000),
+            'network_rx': naturalsize(resources['network_rx_bytes']),
+            'network_tx': naturalsize(resources['network_tx_bytes']),
+            'uptime': reference_uptime(resources['uptime'])
+        })
+    return rows
+
+def fleet(servers, rng):
+    return [{
+        'details': {'limits': {'memory': rng.choice((0, 1024, 2048, 4096)), 'disk': rng.choice((0, 10240, 20480))}},
+        'stats': {'resources': {
+            'memory_bytes': rng.randint(0, 8_000_000_000),
+            'disk_bytes': rng.randint(0, 50_000_000_000),
+            'network_rx_bytes': rng.randint(0, 10 ** 12),
+            'network_tx_bytes': rng.randint(0, 10 ** 12),
+            'uptime': rng.randint(0, 90 * 86_400_000)
+        }}
+    } for _ in range(servers)]
+
+def check(all_stats):
+    for value in EDGE_SIZES:
+        if format_size(value) != naturalsize(value):
+            raise SystemExit(f"Mismatch for size {value!r}: {format_size(value)!r} != {naturalsize(value)!r}")
+    edge_stats = [{
+        'details': {'limits': {'memory': 0, 'disk': 1}},
+        'stats': {'resources': {'memory_bytes': size, 'disk_bytes': size, 'network_rx_bytes': size, 'network_tx_bytes': size, 'uptime': uptime}}
+    } for size, uptime in zip(EDGE_SIZES, EDGE_UPTIMES * len(EDGE_SIZES))]
+    for stats in (all_stats, edge_stats):
+        if ResourceFormatter().format(stats) != reference_format(stats):
+            raise SystemExit("ResourceFormatter output differs from naturalsize/format_uptime")
+
+def timed(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch resource formatting")
+    parser.add_argument('--servers', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20, help="Ticks to time, the best one is reported")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    all_stats = fleet(args.servers, rng)
+    check(all_stats)
+
+    formatter = ResourceFormatter()
+    reference = timed(lambda: reference_format(all_stats), args.repeat)
+    batch = timed(lambda: formatter.format(all_stats), args.repeat)
+    print(f"{args.servers} servers, best of {args.repeat} ticks (output identical)")
+    print(f"  one value at a time  {reference * 1000:8.2f} ms")
+    print(f"  ResourceFormatter    {batch * 1000:8.2f} ms  ({reference / batch:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""End-to-end benchmark of Application.update_all_servers.
+
+Each scenario runs in its own process against tools/fake_panel.py (started
+as a separate process, so its CPU is not counted) and a stubbed Discord
+client that records every API call instead of sending it. Results are
+written as JSON so two runs can be compared:
+
+    python tools/benchmark.py --servers 10 100 1000 --output bench.json
+    python tools/benchmark.py --compare bench.json --output bench-new.json
+"""
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import platform
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Lower is better for every compared metric
+COMPARED = ('tick_p50_ms', 'panel_requests_per_tick', 'discord_calls_per_tick', 'cpu_ms_per_tick')
+
+class StubDiscordClient:
+    """Just enough of discord.Client for the stats pipeline, counting API calls"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.user = SimpleNamespace(id=1, name="Benchmark", discriminator="0000")
+        self.calls = {}
+        self.channels = {}
+        self._ids = itertools.count(10_000)
+
+    async def call(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    def get_channel(self, channel_id):
+        channel = self.channels.get(channel_id)
+        if channel is None:
+            channel = self.channels[channel_id] = StubChannel(self, channel_id)
+        return channel
+
+    async def fetch_channel(self, channel_id):
+        await self.call('fetch_channel')
+        return self.get_channel(channel_id)
+
+class StubChannel:
+    def __init__(self, client, channel_id):
+        self.client = client
+        self.id = channel_id
+        self.name = f"bench-{channel_id}"
+        self.messages = {}
+
+    async def send(self, content=None, embed=None, embeds=None, view=None, **kwargs):
+        await self.client.call('send')
+        message = StubMessage(self, next(self.client._ids), [embed] if embed else list(embeds or []))
+        self.messages[message.id] = message
+        return message
+
+    def get_partial_message(self, message_id):
+        return self.messages.get(message_id) or StubMessage(self, message_id, [])
+
+    async def history(self, limit=100):
+        await self.client.call('history')
+        for message_id in sorted(self.messages, reverse=True)[:limit]:
+            yield self.messages[message_id]
+
+class StubMessage:
+    def __init__(self, channel, message_id, embeds):
+        self.channel = channel
+        self.id = message_id
+        self.embeds = embeds
+        self.author = channel.client.user
+
+    def _check(self):
+        import discord
+        if self.id not in self.channel.messages:
+            raise discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown Message")
+
+    async def edit(self, embed=None, embeds=None, view=None, **kwargs):
+        await self.channel.client.call('edit')
+        self._check()
+        self.embeds = [embed] if embed else list(embeds or [])
+        return self
+
+    async def delete(self):
+        await self.channel.client.call('delete')
+        self._check()
+        del self.channel.messages[self.id]
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_fake_panel(args, servers):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'tools', 'fake_panel.py'),
+         '--servers', str(servers), '--port', str(port), '--quiet',
+         '--latency', str(args.panel_latency), '--error-rate', str(args.error_rate), '--seed', str(args.seed)],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    line = process.stdout.readline()
+    if 'listening' not in line:
+        process.kill()
+        raise RuntimeError(f"Fake panel did not start: {line}")
+    return process, f"http://127.0.0.1:{port}"
+
+async def fake_panel_requests(url):
+    import aiohttp
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{url}/_fake/stats") as response:
+            return (await response.json())['requests']
+
+def write_config(path, server_ids, args):
+    import yaml
+    with open(os.path.join(ROOT, 'config.yml'), 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    config['server_ids'] = server_ids
+    config['concurrency'] = args.concurrency
+    config['timeout'] = args.timeout
+    config['log_error'] = False
+    config.setdefault('notifier', {})['enable'] = False
+    config.setdefault('metrics', {})['enable'] = False
+    with open(os.path.join(path, 'config.yml'), 'w', encoding='utf-8') as f:
+        yaml.dump(config, f, default_flow_style=False)
+
+async def run_ticks(app, client, panel_url, ticks):
+    """Run the cold tick plus `ticks` steady-state ticks and measure each one"""
+    samples = []
+    for _ in range(ticks + 1):
+        requests_before = await fake_panel_requests(panel_url)
+        calls_before = client.total_calls()
+        cpu_before = time.process_time()
+        started = time.perf_counter()
+        await app.update_all_servers()
+        tick_ms = (time.perf_counter() - started) * 1000
+        # Discord edits go out in the background; wait for them so calls are counted per tick
+        await app.edit_scheduler.drain()
+        samples.append({
+            'tick_ms': tick_ms,
+            'publish_ms': (time.perf_counter() - started) * 1000,
+            'cpu_ms': (time.process_time() - cpu_before) * 1000,
+            'panel_requests': await fake_panel_requests(panel_url) - requests_before,
+            'discord_calls': client.total_calls() - calls_before
+        })
+    return samples
+
+def run_scenario(args):
+    """Child process: benchmark one fleet size and print a JSON result"""
+    from handlers.perf import percentile
+    from tools.fake_panel import server_uuid
+
+    panel, panel_url = start_fake_panel(args, args.scenario)
+    workdir = tempfile.mkdtemp(prefix='pss-bench-')
+    cwd = os.getcwd()
+    try:
+        write_config(workdir, [server_uuid(i) for i in range(args.scenario)], args)
+        os.chdir(workdir)
+        os.environ.update({'PanelURL': panel_url, 'PanelKEY': 'ptlc_benchmark', 'DiscordChannel': '1'})
+
+        async def main():
+            from handlers.application import Application
+            from handlers.panel_client import close_panel_clients
+            from handlers.perf import PERF
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                app = Application()
+                client = StubDiscordClient(args.discord_latency)
+                app.client = client
+                tracemalloc.start()
+                samples = await run_ticks(app, client, panel_url, args.ticks)
+                _, traced_peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                await app.state_cache.flush()
+                await close_panel_clients()
+            return samples, traced_peak, PERF.summary(), client.calls
+
+        samples, traced_peak, phases, calls = asyncio.run(main())
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+        panel.terminate()
+        panel.wait()
+
+    cold, steady = samples[0], samples[1:] or samples
+    ticks = sorted(sample['tick_ms'] for sample in steady)
+    result = {
+        'servers': args.scenario,
+        'ticks': len(steady),
+        'cold_tick_ms': round(cold['tick_ms'], 2),
+        'cold_panel_requests': cold['panel_requests'],
+        'tick_p50_ms': round(percentile(ticks, 50), 2),
+        'tick_p95_ms': round(percentile(ticks, 95), 2),
+        'tick_max_ms': round(max(ticks), 2),
+        'publish_p50_ms': round(percentile(sorted(s['publish_ms'] for s in steady), 50), 2),
+        'panel_requests_per_tick': sum(s['panel_requests'] for s in steady) / len(steady),
+        'discord_calls_per_tick': sum(s['discord_calls'] for s in steady) / len(steady),
+        'cpu_ms_per_tick': round(sum(s['cpu_ms'] for s in steady) / len(steady), 2),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'traced_peak_mb': round(traced_peak / 1024 / 1024, 2),
+        'discord_calls': calls,
+        'phases_ms': {phase: {k: round(v, 2) for k, v in row.items()} for phase, row in phases.items()}
+    }
+    print(json.dumps(result))
+
+def compare(previous, current, tolerance):
+    """Print per-metric changes; return True if anything regressed beyond tolerance"""
+    regressed = False
+    before = {row['servers']: row for row in previous['results']}
+    for row in current['results']:
+        old = before.get(row['servers'])
+        if old is None:
+            continue
+        for metric in COMPARED:
+            a, b = old.get(metric), row.get(metric)
+            if not a or b is None:
+                continue
+            change = (b - a) / a
+            flag = ''
+            if change > tolerance:
+                flag = '  <-- regression'
+                regressed = True
+            print(f"{row['servers']:>6} servers  {metric:<26}{a:>12.2f} -> {b:>12.2f}  ({change:+.1%}){flag}")
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PteroServerStats against a fake panel and Discord stub")
+    parser.add_argument('--servers', type=int, nargs='+', default=[10, 100, 1000], help="Fleet sizes to run")
+    parser.add_argument('--ticks', type=int, default=5, help="Steady-state ticks per fleet size, after one cold tick")
+    parser.add_argument('--panel-latency', type=float, default=0.02, help="Seconds added to every panel request")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of panel requests that fail with 500")
+    parser.add_argument('--discord-latency', type=float, default=0.05, help="Seconds per stubbed Discord call")
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--timeout', type=float, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    parser.add_argument('--compare', help="Previous JSON report to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative slowdown before --compare fails")
+    parser.add_argument('--scenario', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario is not None:
+        run_scenario(args)
+        return
+
+    results = []
+    for servers in args.servers:
+        print(f"Benchmarking {servers} servers...", file=sys.stderr)
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), *sys.argv[1:], '--scenario', str(servers)],
+            capture_output=True, text=True
+        )
+        if output.returncode != 0:
+            print(output.stderr, file=sys.stderr)
+            sys.exit(output.returncode)
+        results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'settings': {k: v for k, v in vars(args).items() if k not in ('output', 'compare', 'scenario')}
+        },
+        'results': results
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        if compare(previous, report, args.tolerance):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
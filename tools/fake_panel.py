@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""Local stand-in for a Pterodactyl/Pelican panel and its Wings websocket.
+
+Serves the client API endpoints PteroServerStats uses, plus a per-server
+websocket that streams `stats` events, with configurable latency and error
+rate. Used by the benchmark harness and for trying the bot without a panel:
+
+    python tools/fake_panel.py --servers 20 --port 8080
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from aiohttp import web
+
+STATES = ("running", "running", "running", "offline", "starting")
+
+def server_uuid(index):
+    """Deterministic UUID for the fake server at index, with a distinct short identifier"""
+    return str(uuid.UUID(int=random.Random(index).getrandbits(128), version=4))
+
+class FakePanel:
+    """aiohttp application emulating the panel client API and Wings websocket"""
+
+    def __init__(self, servers=10, latency=0.0, error_rate=0.0, stats_interval=2.0, token_ttl=600, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.stats_interval = stats_interval
+        self.token_ttl = token_ttl
+        self.random = random.Random(seed)
+        self.servers = {}
+        for index in range(servers):
+            server_id = server_uuid(index)
+            self.servers[server_id] = {
+                'uuid': server_id,
+                'identifier': server_id[:8],
+                'name': f"Fake Server {index + 1}",
+                'state': STATES[index % len(STATES)],
+                'started': time.time() - self.random.randint(0, 86400)
+            }
+        self.requests = 0
+        self.requests_by_route = {}
+        self.sockets = 0
+        self.runner = None
+        self.url = None
+
+        self.app = web.Application(middlewares=[self._middleware])
+        self.app.router.add_get('/api/client', self.list_servers)
+        self.app.router.add_get('/api/client/servers/{server_id}', self.server_details)
+        self.app.router.add_get('/api/client/servers/{server_id}/resources', self.server_resources)
+        self.app.router.add_get('/api/client/servers/{server_id}/websocket', self.websocket_credentials)
+        self.app.router.add_get('/ws/servers/{server_id}', self.websocket)
+        self.app.router.add_get('/_fake/stats', self.fake_stats)
+
+    @web.middleware
+    async def _middleware(self, request, handler):
+        if request.path.startswith('/api/'):
+            self.requests += 1
+            route = request.match_info.route.resource.canonical if request.match_info.route.resource else request.path
+            self.requests_by_route[route] = self.requests_by_route.get(route, 0) + 1
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            if self.error_rate and self.random.random() < self.error_rate:
+                raise web.HTTPInternalServerError()
+        return await handler(request)
+
+    def _server(self, request):
+        server_id = request.match_info['server_id']
+        for server in self.servers.values():
+            if server_id in (server['uuid'], server['identifier']):
+                return server
+        raise web.HTTPNotFound()
+
+    def _attributes(self, server):
+        return {
+            'server_owner': True,
+            'identifier': server['identifier'],
+            'uuid': server['uuid'],
+            'name': server['name'],
+            'limits': {'memory': 2048, 'swap': 0, 'disk': 10240, 'io': 500, 'cpu': 200, 'threads': None}
+        }
+
+    def _resources(self, server):
+        running = server['state'] != 'offline'
+        return {
+            'memory_bytes': self.random.randint(100_000_000, 2_000_000_000) if running else 0,
+            'cpu_absolute': round(self.random.uniform(0, 200), 3) if running else 0,
+            'disk_bytes': self.random.randint(1_000_000, 10_000_000_000),
+            'network_rx_bytes': self.random.randint(0, 10_000_000_000),
+            'network_tx_bytes': self.random.randint(0, 10_000_000_000),
+            'uptime': int((time.time() - server['started']) * 1000) if running else 0
+        }
+
+    async def list_servers(self, request):
+        per_page = min(100, int(request.query.get('per_page', 50)))
+        page = max(1, int(request.query.get('page', 1)))
+        servers = list(self.servers.values())
+        total_pages = max(1, -(-len(servers) // per_page))
+        chunk = servers[(page - 1) * per_page:page * per_page]
+        return web.json_response({
+            'object': 'list',
+            'data': [{'object': 'server', 'attributes': self._attributes(server)} for server in chunk],
+            'meta': {'pagination': {
+                'total': len(servers), 'count': len(chunk), 'per_page': per_page,
+                'current_page': page, 'total_pages': total_pages
+            }}
+        })
+
+    async def fake_stats(self, request):
+        """Request counters, for benchmarks running the panel in another process"""
+        return web.json_response({
+            'requests': self.requests,
+            'requests_by_route': self.requests_by_route,
+            'sockets': self.sockets
+        })
+
+    async def server_details(self, request):
+        return web.json_response({'object': 'server', 'attributes': self._attributes(self._server(request))})
+
+    async def server_resources(self, request):
+        server = self._server(request)
+        return web.json_response({'object': 'stats', 'attributes': {
+            'current_state': server['state'],
+            'is_suspended': False,
+            'resources': self._resources(server)
+        }})
+
+    async def websocket_credentials(self, request):
+        server = self._server(request)
+        socket_url = f"{self.url.replace('http', 'ws', 1)}/ws/servers/{server['uuid']}"
+        return web.json_response({'data': {'token': f"token-{time.time()}", 'socket': socket_url}})
+
+    async def websocket(self, request):
+        server = self._server(request)
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.sockets += 1
+        streaming = None
+        authed_at = None
+        try:
+            async for message in ws:
+                payload = json.loads(message.data)
+                event = payload.get('event')
+                if event == 'auth':
+                    authed_at = time.monotonic()
+                    await ws.send_json({'event': 'auth success'})
+                    await ws.send_json({'event': 'status', 'args': [server['state']]})
+                elif event == 'send stats' and authed_at and streaming is None:
+                    streaming = asyncio.create_task(self._stream(ws, server, lambda: authed_at))
+        finally:
+            self.sockets -= 1
+            if streaming:
+                streaming.cancel()
+        return ws
+
+    async def _stream(self, ws, server, authed_at):
+        warned = False
+        state = server['state']
+        while not ws.closed:
+            if server['state'] != state:
+                state = server['state']
+                await ws.send_json({'event': 'status', 'args': [state]})
+            age = time.monotonic() - authed_at()
+            if age >= self.token_ttl:
+                await ws.send_json({'event': 'token expired'})
+                await ws.close()
+                return
+            if age >= self.token_ttl - 60 and not warned:
+                warned = True
+                await ws.send_json({'event': 'token expiring'})
+            elif age < self.token_ttl - 60:
+                warned = False
+            if server['state'] != 'offline':
+                resources = self._resources(server)
+                await ws.send_json({'event': 'stats', 'args': [json.dumps({
+                    'memory_bytes': resources['memory_bytes'],
+                    'memory_limit_bytes': 2048 * 1024 * 1024,
+                    'cpu_absolute': resources['cpu_absolute'],
+                    'network': {'rx_bytes': resources['network_rx_bytes'], 'tx_bytes': resources['network_tx_bytes']},
+                    'state': server['state'],
+                    'disk_bytes': resources['disk_bytes'],
+                    'uptime': resources['uptime']
+                })]})
+            await asyncio.sleep(self.stats_interval)
+
+    def set_state(self, server_id, state):
+        """Change a server's power state, as seen by the API and the websocket"""
+        self.servers[server_id]['state'] = state
+
+    async def start(self, host='127.0.0.1', port=0):
+        """Start serving; returns the base URL"""
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{bound_port}"
+        return self.url
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+async def main():
+    parser = argparse.ArgumentParser(description="Run a fake Pterodactyl/Pelican panel")
+    parser.add_argument('--servers', type=int, default=10)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every API request")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of API requests answered with 500")
+    parser.add_argument('--stats-interval', type=float, default=2.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--quiet', action='store_true', help="Do not list the server IDs")
+    args = parser.parse_args()
+
+    panel = FakePanel(args.servers, args.latency, args.error_rate, args.stats_interval, seed=args.seed)
+    url = await panel.start(args.host, args.port)
+    print(f"Fake panel listening on {url}", flush=True)
+    if not args.quiet:
+        print("Server IDs:")
+        for server_id in panel.servers:
+            print(f"  {server_id}")
+    await asyncio.Event().wait()
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass